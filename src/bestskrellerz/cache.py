@@ -0,0 +1,152 @@
+"""On-disk cache for idempotent Wikidata lookups."""
+
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+log = logging.getLogger(__name__)
+
+DEFAULT_EXPIRE = 30 * 24 * 3600  # 30 days
+
+# Returned by DiskCache.get when a key is absent, since None is a valid cached value
+MISSING = object()
+
+
+def default_cache_dir() -> Path:
+    """Cache directory: BESTSKRELLERZ_CACHE_DIR, or ~/.cache/bestskrellerz."""
+    return Path(os.environ.get("BESTSKRELLERZ_CACHE_DIR", Path.home() / ".cache" / "bestskrellerz"))
+
+
+class DiskCache:
+    """
+    JSON-serializable values stored in a SQLite file, keyed by string.
+
+    Entries expire ``expire`` seconds after they are written. ``None`` is
+    stored like any other value, so negative lookups are remembered too.
+    The database file is opened on first use and shared across threads.
+
+    The cache is best-effort: if the file cannot be opened or written (an
+    unwritable directory, a database locked by another process), reads are
+    treated as misses and writes are dropped, with one warning logged.
+    """
+
+    def __init__(self, path: Union[str, Path], expire: float = DEFAULT_EXPIRE):
+        self.path = Path(path)
+        self.expire = expire
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._warned = False
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            self._conn = conn
+        return self._conn
+
+    def _failed(self, error: Exception) -> None:
+        """Log the first cache failure; later ones are ignored quietly."""
+        if not self._warned:
+            self._warned = True
+            log.warning("Cache %s unavailable, continuing without it: %s", self.path, error)
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        """Return the cached value for key, or default if absent, expired or unreadable."""
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+        except (sqlite3.Error, OSError) as e:
+            self._failed(e)
+            return default
+        if row is None or row[1] < time.time():
+            return default
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value under key."""
+        self._write(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + self.expire),
+        )
+
+    def delete(self, key: str) -> None:
+        """Remove key from the cache if present."""
+        self._write("DELETE FROM cache WHERE key = ?", (key,))
+
+    def _write(self, sql: str, params: tuple) -> None:
+        """Run one write statement, dropping it if the cache is unavailable."""
+        try:
+            with self._lock:
+                conn = self._connection()
+                try:
+                    conn.execute(sql, params)
+                    conn.commit()
+                except sqlite3.Error:
+                    conn.rollback()
+                    raise
+        except (sqlite3.Error, OSError) as e:
+            self._failed(e)
+
+
+def memoize(
+    cache: DiskCache,
+    namespace: str,
+    dump: Callable[[Any], Any] = lambda value: value,
+    load: Callable[[Any], Any] = lambda value: value,
+) -> Callable:
+    """
+    Cache a function's results in a DiskCache, keyed by its positional arguments.
+
+    Return values, including None, are stored as ``dump(value)`` and read back
+    with ``load``. Exceptions are not cached, so failed requests are retried
+    on the next call. A cache that is unavailable, or an entry ``load``
+    cannot read, only costs a miss. The wrapped function gets an
+    ``invalidate(*args)`` method that drops the entry for those arguments.
+
+    Args:
+        cache: Cache to store results in
+        namespace: Key prefix, unique per decorated function
+        dump: Converts a return value to something JSON-serializable
+        load: Converts a stored value back into a return value
+    """
+    def decorator(func: Callable) -> Callable:
+        def make_key(args: tuple) -> str:
+            return f"{namespace}:{json.dumps(args)}"
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            key = make_key(args)
+            cached = cache.get(key)
+            if cached is not MISSING:
+                try:
+                    return load(cached)
+                except (TypeError, ValueError, KeyError) as e:
+                    # Written by an older version of the function; refetch
+                    log.debug("Discarding unreadable cache entry %s: %s", key, e)
+
+            value = func(*args)
+            try:
+                cache.set(key, dump(value))
+            except (TypeError, ValueError) as e:
+                log.debug("Not caching %s: %s", key, e)
+            return value
+
+        wrapper.invalidate = lambda *args: cache.delete(make_key(args))
+        return wrapper
+
+    return decorator
@@ -1,14 +1,57 @@
 """CLI entry point for the NYTimes Best Seller Tracker."""
 
+import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
 import click
 from dotenv import load_dotenv
 
-from . import db
 from .api import NYTimesClient, NYTimesAPIError, RateLimitError
+from .ratelimit import RateLimiter
+from .wikidata import query_wikidata_batch_by_isbn, query_wikidata_batch_by_title
+
+
+NYT_REQUEST_DELAY = 12.0  # NYTimes allows 5 requests per minute
+MAX_RETRIES = 5  # attempts per request when the rate limit is hit
+MAX_BACKOFF = 60  # cap in seconds on the wait between retries
+SERIES_FLUSH_SIZE = 500  # series matches to collect before writing them to the database
+
+# Lists whose books are checked for series information by fetch-series
+FICTION_LISTS = [
+    'hardcover-fiction', 'trade-fiction-paperback', 'e-book-fiction',
+    'combined-print-and-e-book-fiction', 'combined-print-fiction',
+    'mass-market-paperback', 'audio-fiction'
+]
+
+
+@lru_cache(maxsize=None)
+def _db():
+    """Import the db module on first use, so commands like --help skip loading duckdb."""
+    from . import db
+    return db
+
+
+def _fetch_with_retries(limiter: RateLimiter, fetch, *args):
+    """
+    Call an API fetch under the rate limiter, retrying when the limit is hit.
+
+    Waits for the error's ``retry_after`` when the API supplied one, otherwise
+    backs off exponentially (1, 2, 4, ... seconds, capped at MAX_BACKOFF).
+    Re-raises RateLimitError once MAX_RETRIES attempts have failed.
+    """
+    for attempt in range(MAX_RETRIES):
+        limiter.acquire()
+        try:
+            return fetch(*args)
+        except RateLimitError as e:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            time.sleep(getattr(e, "retry_after", None) or min(MAX_BACKOFF, 2 ** attempt))
 
 
 @click.group()
@@ -23,11 +66,10 @@ def init():
     """Initialize the database schema in MotherDuck."""
     click.echo("Connecting to MotherDuck...")
     try:
-        conn = db.get_connection()
-        click.echo("Creating tables...")
-        db.init_schema(conn)
-        click.echo("Database schema initialized successfully.")
-        conn.close()
+        with _db().get_pool().acquire() as conn:
+            click.echo("Creating tables...")
+            _db().init_schema(conn)
+            click.echo("Database schema initialized successfully.")
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
         sys.exit(1)
@@ -43,10 +85,8 @@ def sync_lists():
         click.echo(f"Found {len(lists)} lists.")
 
         click.echo("Saving to MotherDuck...")
-        conn = db.get_connection()
-        for lst in lists:
-            db.upsert_list(conn, lst)
-        conn.close()
+        with _db().get_pool().acquire() as conn:
+            _db().upsert_lists_batch(conn, lists)
 
         click.echo(f"Successfully synced {len(lists)} lists.")
     except NYTimesAPIError as e:
@@ -68,10 +108,8 @@ def sync_current():
         click.echo(f"Found {len(books)} books and {len(rankings)} rankings.")
 
         click.echo("Saving to MotherDuck...")
-        conn = db.get_connection()
-        db.upsert_books_batch(conn, books)
-        db.upsert_rankings_batch(conn, rankings)
-        conn.close()
+        with _db().get_pool().acquire() as conn:
+            _db().save_week(conn, books, rankings)
 
         click.echo(f"Successfully synced {len(rankings)} rankings for {len(books)} books.")
     except RateLimitError:
@@ -106,11 +144,23 @@ def sync_current():
     default=50,
     help="Maximum API requests to make (to stay within rate limits). Default: 50",
 )
+@click.option(
+    "--workers",
+    default=4,
+    help="Number of concurrent API requests. Default: 4",
+)
+@click.option(
+    "--delay",
+    default=NYT_REQUEST_DELAY,
+    help="Minimum delay between API requests in seconds. Default: 12 (5 per minute)",
+)
 def backfill(
     list_name: Optional[str],
     start_date: Optional[datetime],
     end_date: Optional[datetime],
     max_requests: int,
+    workers: int,
+    delay: float,
 ):
     """Backfill historical Best Seller data."""
     # Set defaults
@@ -126,59 +176,60 @@ def backfill(
 
     try:
         client = NYTimesClient()
-        conn = db.get_connection()
+        with _db().get_pool().acquire() as conn:
+            # Get lists to process
+            if list_name:
+                list_names = [list_name]
+            else:
+                list_names = _db().get_all_list_names(conn)
+                if not list_names:
+                    click.echo("No lists found. Run 'sync-lists' first.", err=True)
+                    sys.exit(1)
+
+            request_count = 0
+            total_books = 0
+            total_rankings = 0
+
+            # Generate weekly dates (NYTimes publishes weekly)
+            n_weeks = (end - start).days // 7 + 1
+            dates_to_fetch = [start + timedelta(weeks=i) for i in range(n_weeks)]
+
+            click.echo(f"Processing {len(dates_to_fetch)} weeks for {len(list_names)} lists...")
+
+            requests_to_make = [(fetch_date, ln) for fetch_date in dates_to_fetch for ln in list_names]
+            if len(requests_to_make) > max_requests:
+                click.echo(f"Limiting to max requests ({max_requests}).")
+                requests_to_make = requests_to_make[:max_requests]
+
+            # Fetch concurrently; results are written to the database as they arrive
+            limiter = RateLimiter(delay)
+            executor = ThreadPoolExecutor(max_workers=workers)
+            futures = {
+                executor.submit(_fetch_with_retries, limiter, client.get_list, ln, fetch_date): (fetch_date, ln)
+                for fetch_date, ln in requests_to_make
+            }
+            try:
+                for future in as_completed(futures):
+                    fetch_date, ln = futures[future]
+                    try:
+                        books, rankings = future.result()
+                        request_count += 1
+                        click.echo(f"Fetched {ln} for {fetch_date}")
+
+                        _db().save_week(conn, books, rankings)
+
+                        total_books += len(books)
+                        total_rankings += len(rankings)
+
+                    except RateLimitError:
+                        click.echo(f"Rate limit hit after {MAX_RETRIES} attempts. Stopping backfill.", err=True)
+                        break
+                    except NYTimesAPIError as e:
+                        click.echo(f"API error for {ln} on {fetch_date}: {e}", err=True)
+                        continue
+            finally:
+                executor.shutdown(cancel_futures=True)
 
-        # Get lists to process
-        if list_name:
-            list_names = [list_name]
-        else:
-            list_names = db.get_all_list_names(conn)
-            if not list_names:
-                click.echo("No lists found. Run 'sync-lists' first.", err=True)
-                conn.close()
-                sys.exit(1)
-
-        request_count = 0
-        total_books = 0
-        total_rankings = 0
-
-        # Generate weekly dates (NYTimes publishes weekly)
-        current_date = start
-        dates_to_fetch = []
-        while current_date <= end:
-            dates_to_fetch.append(current_date)
-            current_date += timedelta(weeks=1)
-
-        click.echo(f"Processing {len(dates_to_fetch)} weeks for {len(list_names)} lists...")
-
-        for fetch_date in dates_to_fetch:
-            if request_count >= max_requests:
-                click.echo(f"Reached max requests limit ({max_requests}). Stopping.")
-                break
-
-            for ln in list_names:
-                if request_count >= max_requests:
-                    break
-
-                try:
-                    click.echo(f"Fetching {ln} for {fetch_date}...")
-                    books, rankings = client.get_list(ln, fetch_date)
-                    request_count += 1
-
-                    db.upsert_books_batch(conn, books)
-                    db.upsert_rankings_batch(conn, rankings)
-
-                    total_books += len(books)
-                    total_rankings += len(rankings)
-
-                except RateLimitError:
-                    click.echo("Rate limit hit. Stopping backfill.", err=True)
-                    break
-                except NYTimesAPIError as e:
-                    click.echo(f"API error for {ln} on {fetch_date}: {e}", err=True)
-                    continue
-
-        conn.close()
         click.echo(f"Backfill complete. Made {request_count} requests.")
         click.echo(f"Added/updated {total_books} books and {total_rankings} rankings.")
 
@@ -203,7 +254,23 @@ def backfill(
     default=100,
     help="Maximum API requests to make. Default: 100",
 )
-def fetch_history(start_date: Optional[datetime], weeks: int, max_requests: int):
+@click.option(
+    "--workers",
+    default=4,
+    help="Number of concurrent API requests. Default: 4",
+)
+@click.option(
+    "--delay",
+    default=NYT_REQUEST_DELAY,
+    help="Minimum delay between API requests in seconds. Default: 12 (5 per minute)",
+)
+def fetch_history(
+    start_date: Optional[datetime],
+    weeks: int,
+    max_requests: int,
+    workers: int,
+    delay: float,
+):
     """Fetch as much historical data as possible using the overview endpoint.
 
     This is the most efficient way to get historical data because each request
@@ -228,50 +295,54 @@ def fetch_history(start_date: Optional[datetime], weeks: int, max_requests: int)
 
     try:
         client = NYTimesClient()
-        conn = db.get_connection()
-
-        request_count = 0
-        total_books = 0
-        total_rankings = 0
-        weeks_fetched = 0
-
-        for week_num in range(weeks):
-            if request_count >= max_requests:
-                click.echo(f"\nReached max requests limit ({max_requests}).")
-                break
-
-            fetch_date = start - timedelta(weeks=week_num)
-
+        with _db().get_pool().acquire() as conn:
+            request_count = 0
+            total_books = 0
+            total_rankings = 0
+            weeks_fetched = 0
+
+            dates_to_fetch = [start - timedelta(weeks=week_num) for week_num in range(weeks)]
+            if len(dates_to_fetch) > max_requests:
+                click.echo(f"Limiting to max requests ({max_requests}).")
+                dates_to_fetch = dates_to_fetch[:max_requests]
+
+            # Fetch concurrently; results are written to the database as they arrive
+            limiter = RateLimiter(delay)
+            executor = ThreadPoolExecutor(max_workers=workers)
+            futures = {
+                executor.submit(_fetch_with_retries, limiter, client.get_overview_full, fetch_date): fetch_date
+                for fetch_date in dates_to_fetch
+            }
             try:
-                click.echo(f"[{request_count + 1}/{max_requests}] Fetching week of {fetch_date}...", nl=False)
-                books, rankings, lists = client.get_overview_full(fetch_date)
-                request_count += 1
-                weeks_fetched += 1
-
-                # Save list metadata
-                for lst in lists:
-                    db.upsert_list(conn, lst)
-
-                db.upsert_books_batch(conn, books)
-                db.upsert_rankings_batch(conn, rankings)
-
-                total_books += len(books)
-                total_rankings += len(rankings)
-
-                click.echo(f" {len(books)} books, {len(rankings)} rankings")
-
-            except RateLimitError:
-                click.echo("\nRate limit hit. Waiting 60 seconds...")
-                import time
-                time.sleep(60)
-                # Retry this week
-                week_num -= 1
-                continue
-            except NYTimesAPIError as e:
-                click.echo(f"\nAPI error for {fetch_date}: {e}")
-                continue
-
-        conn.close()
+                for future in as_completed(futures):
+                    fetch_date = futures[future]
+                    try:
+                        books, rankings, lists = future.result()
+                        request_count += 1
+                        weeks_fetched += 1
+
+                        _db().save_week(conn, books, rankings, lists)
+
+                        total_books += len(books)
+                        total_rankings += len(rankings)
+
+                        click.echo(
+                            f"[{request_count}/{len(dates_to_fetch)}] Week of {fetch_date}: "
+                            f"{len(books)} books, {len(rankings)} rankings"
+                        )
+
+                    except RateLimitError:
+                        click.echo(
+                            f"Rate limit hit for {fetch_date} after {MAX_RETRIES} attempts. Stopping fetch.",
+                            err=True,
+                        )
+                        break
+                    except NYTimesAPIError as e:
+                        click.echo(f"API error for {fetch_date}: {e}", err=True)
+                        continue
+            finally:
+                # Drop the weeks not yet started so they spend no more retries
+                executor.shutdown(cancel_futures=True)
 
         click.echo()
         click.echo("=== Fetch Complete ===")
@@ -295,9 +366,8 @@ def create_unified_view():
     """
     click.echo("Creating unified view...")
     try:
-        conn = db.get_connection()
-        db.init_unified_view(conn)
-        conn.close()
+        with _db().get_pool().acquire() as conn:
+            _db().init_unified_view(conn)
         click.echo("Created 'all_rankings' view successfully.")
         click.echo("Query it with: SELECT * FROM all_rankings WHERE list_name = 'hardcover-fiction' LIMIT 10")
     except Exception as e:
@@ -307,7 +377,12 @@ def create_unified_view():
 
 @cli.command("import-csv")
 @click.argument("csv_path", type=click.Path(exists=True))
-def import_csv(csv_path: str):
+@click.option(
+    "--threads",
+    type=int,
+    help="Number of DuckDB threads to use for parsing. Defaults to DuckDB's setting.",
+)
+def import_csv(csv_path: str, threads: Optional[int]):
     """Import historical bestseller data from a CSV file.
 
     This imports data into the historical_rankings table, skipping any
@@ -317,19 +392,16 @@ def import_csv(csv_path: str):
 
         bestskrellerz import-csv nyt_hardcover_fiction_bestsellers-lists.csv
     """
-    import os
-
     # Convert to absolute path for DuckDB
     abs_path = os.path.abspath(csv_path)
 
     click.echo(f"Importing data from: {abs_path}")
 
     try:
-        conn = db.get_connection()
-        click.echo("Connected to MotherDuck...")
+        with _db().get_pool().acquire() as conn:
+            click.echo("Connected to MotherDuck...")
 
-        result = db.import_historical_csv(conn, abs_path)
-        conn.close()
+            result = _db().import_historical_csv(conn, abs_path, threads=threads)
 
         click.echo()
         click.echo("=== Import Complete ===")
@@ -359,7 +431,12 @@ def import_csv(csv_path: str):
     default=1.0,
     help="Delay between Wikidata requests in seconds. Default: 1.0",
 )
-def fetch_series(batch_size: int, max_books: int, delay: float):
+@click.option(
+    "--workers",
+    default=4,
+    help="Number of concurrent Wikidata requests. Default: 4",
+)
+def fetch_series(batch_size: int, max_books: int, delay: float, workers: int):
     """Fetch series information from Wikidata for fiction books.
 
     Uses ISBN-based lookup first (most reliable), then falls back to
@@ -374,123 +451,127 @@ def fetch_series(batch_size: int, max_books: int, delay: float):
         # Test with first 100 books
         bestskrellerz fetch-series --max-books 100
     """
-    import time
-    from .wikidata import query_wikidata_batch_by_isbn, query_wikidata_batch_by_title
-
     click.echo("Fetching series information from Wikidata...")
     click.echo(f"Batch size: {batch_size}")
     click.echo(f"Delay between requests: {delay}s")
+    click.echo(f"Concurrent requests: {workers}")
     click.echo("Strategy: ISBN lookup first, then title matching with variations")
     click.echo()
 
     try:
-        conn = db.get_connection()
-
-        # Get fiction books that don't have series info yet
-        fiction_lists = [
-            'hardcover-fiction', 'trade-fiction-paperback', 'e-book-fiction',
-            'combined-print-and-e-book-fiction', 'combined-print-fiction',
-            'mass-market-paperback', 'audio-fiction'
-        ]
-        lists_clause = ", ".join([f"'{l}'" for l in fiction_lists])
-
-        # Get unique titles from fiction lists without series info
-        query = f"""
-            SELECT DISTINCT b.primary_isbn13, b.title
-            FROM books b
-            JOIN rankings r ON b.primary_isbn13 = r.primary_isbn13
-            WHERE r.list_name_encoded IN ({lists_clause})
-            AND b.series_name IS NULL
-            ORDER BY b.title
-        """
-        if max_books > 0:
-            query += f" LIMIT {max_books}"
-
-        result = conn.execute(query).fetchall()
-        books_to_process = [(row[0], row[1]) for row in result]
-
-        click.echo(f"Found {len(books_to_process)} fiction books without series info")
-        click.echo()
-
-        if not books_to_process:
-            click.echo("No books to process.")
-            conn.close()
-            return
-
-        # Process in batches
-        total_found = 0
-        total_processed = 0
-        isbn_hits = 0
-        title_hits = 0
-
-        for i in range(0, len(books_to_process), batch_size):
-            batch = books_to_process[i:i + batch_size]
-            total_processed += len(batch)
-
-            click.echo(f"[{i + 1}-{min(i + batch_size, len(books_to_process))}/{len(books_to_process)}] ", nl=False)
-
-            try:
+        with _db().get_pool().acquire() as conn:
+            # Get unique titles from fiction lists without series info.
+            # The statement text is the same on every run so DuckDB can reuse its plan.
+            query = """
+                SELECT DISTINCT b.primary_isbn13, b.title
+                FROM books b
+                JOIN rankings r ON b.primary_isbn13 = r.primary_isbn13
+                WHERE list_contains(?::VARCHAR[], r.list_name_encoded)
+                AND b.series_name IS NULL
+                ORDER BY b.title
+                LIMIT COALESCE(?, 9223372036854775807)
+            """
+
+            # Fetched column-wise (Arrow when available) and zipped into pairs
+            isbns, titles = _db().fetch_columns(conn.execute(query, [FICTION_LISTS, max_books or None]))
+            books_to_process = list(zip(isbns, titles))
+
+            click.echo(f"Found {len(books_to_process)} fiction books without series info")
+            click.echo()
+
+            if not books_to_process:
+                click.echo("No books to process.")
+                return
+
+            limiter = RateLimiter(delay)
+
+            def lookup_batch(batch):
+                """Look up one batch by ISBN, then by title for the books ISBN missed."""
                 # Step 1: Try ISBN-based lookup first (most reliable)
+                limiter.acquire()
                 isbn_list = [(isbn, isbn) for isbn, title in batch]
                 isbn_results = query_wikidata_batch_by_isbn(isbn_list)
 
-                found_isbns = set(isbn_results.keys())
-                batch_found = len(isbn_results)
-                isbn_hits += batch_found
-
-                # Update database for ISBN matches
-                for isbn, info in isbn_results.items():
-                    conn.execute("""
-                        UPDATE books
-                        SET series_name = ?,
-                            series_position = ?,
-                            wikidata_id = ?
-                        WHERE primary_isbn13 = ?
-                    """, [info.series_name, info.series_position, info.wikidata_id, isbn])
+                updates = [
+                    (isbn, info.series_name, info.series_position, info.wikidata_id)
+                    for isbn, info in isbn_results.items()
+                ]
 
                 # Step 2: For books not found by ISBN, try title matching
-                remaining = [(isbn, title) for isbn, title in batch if isbn not in found_isbns]
+                remaining = [(isbn, title) for isbn, title in batch if isbn not in isbn_results]
+                title_results = {}
 
                 if remaining:
                     titles = [title for _, title in remaining]
                     isbn_map = {title: isbn for isbn, title in remaining}
 
-                    title_results = query_wikidata_batch_by_title(titles)
-
-                    if title_results:
-                        title_hits += len(title_results)
-                        batch_found += len(title_results)
-
-                        for title, info in title_results.items():
-                            isbn = isbn_map.get(title)
-                            if isbn:
-                                conn.execute("""
-                                    UPDATE books
-                                    SET series_name = ?,
-                                        series_position = ?,
-                                        wikidata_id = ?
-                                    WHERE primary_isbn13 = ?
-                                """, [info.series_name, info.series_position, info.wikidata_id, isbn])
-
-                total_found += batch_found
-
-                if batch_found > 0:
-                    click.echo(f"found {batch_found} series (ISBN: {len(isbn_results)}, title: {batch_found - len(isbn_results)})")
-                else:
-                    click.echo("no series found")
-
-            except Exception as e:
-                click.echo(f"error: {e}")
-
-            # Rate limiting
-            if i + batch_size < len(books_to_process):
-                time.sleep(delay)
-
-        conn.close()
+                    # Long batches are split into several queries, each paced separately
+                    title_results = query_wikidata_batch_by_title(titles, limiter=limiter)
+
+                    for title, info in title_results.items():
+                        isbn = isbn_map.get(title)
+                        if isbn:
+                            updates.append((isbn, info.series_name, info.series_position, info.wikidata_id))
+
+                return len(isbn_results), len(title_results), updates
+
+            # Process batches concurrently, writing matches in groups as they arrive
+            total_found = 0
+            total_processed = 0
+            total_failed = 0
+            isbn_hits = 0
+            title_hits = 0
+            pending_updates = []
+
+            executor = ThreadPoolExecutor(max_workers=workers)
+            futures = {
+                executor.submit(lookup_batch, books_to_process[i:i + batch_size]): i
+                for i in range(0, len(books_to_process), batch_size)
+            }
+            try:
+                for future in as_completed(futures):
+                    i = futures[future]
+                    batch_len = min(batch_size, len(books_to_process) - i)
+
+                    click.echo(f"[{i + 1}-{i + batch_len}/{len(books_to_process)}] ", nl=False)
+
+                    try:
+                        batch_isbn_hits, batch_title_hits, updates = future.result()
+                    except Exception as e:
+                        click.echo(f"error: {e}")
+                        total_failed += batch_len
+                        continue
+
+                    # Failed batches stay out of the hit rate
+                    total_processed += batch_len
+                    isbn_hits += batch_isbn_hits
+                    title_hits += batch_title_hits
+                    batch_found = batch_isbn_hits + batch_title_hits
+                    total_found += batch_found
+
+                    if batch_found > 0:
+                        click.echo(f"found {batch_found} series (ISBN: {batch_isbn_hits}, title: {batch_title_hits})")
+                    else:
+                        click.echo("no series found")
+
+                    pending_updates.extend(updates)
+                    if len(pending_updates) >= SERIES_FLUSH_SIZE:
+                        _db().update_books_series_batch(conn, pending_updates)
+                        pending_updates = []
+            finally:
+                # Drops the batches not yet started. Batches already running
+                # finish first, including the session's HTTP retries (up to 3,
+                # honoring Retry-After), so an interrupted run can take a
+                # while to exit.
+                executor.shutdown(cancel_futures=True)
+
+            _db().update_books_series_batch(conn, pending_updates)
 
         click.echo()
         click.echo("=== Fetch Complete ===")
         click.echo(f"Books processed: {total_processed}")
+        if total_failed:
+            click.echo(f"Books in failed batches: {total_failed}")
         click.echo(f"Series found: {total_found}")
         click.echo(f"  - Via ISBN lookup: {isbn_hits}")
         click.echo(f"  - Via title matching: {title_hits}")
@@ -517,46 +598,43 @@ def backfill_books():
     click.echo()
 
     try:
-        conn = db.get_connection()
-
-        # Find titles in all_rankings that don't have book records
-        # Get unique ISBN -> title/author mappings, avoiding ISBN conflicts
-        query = """
-            INSERT OR IGNORE INTO books (primary_isbn13, title, author)
-            SELECT DISTINCT
-                ar.isbn as primary_isbn13,
-                ar.title,
-                ar.author
-            FROM all_rankings ar
-            LEFT JOIN books b ON ar.isbn = b.primary_isbn13
-            WHERE b.primary_isbn13 IS NULL
-              AND ar.isbn IS NOT NULL
-              AND LENGTH(ar.isbn) > 0
-        """
-
-        # First count how many unique ISBNs are missing
-        count_query = """
-            SELECT COUNT(DISTINCT ar.isbn) as cnt
-            FROM all_rankings ar
-            LEFT JOIN books b ON ar.isbn = b.primary_isbn13
-            WHERE b.primary_isbn13 IS NULL
-              AND ar.isbn IS NOT NULL
-              AND LENGTH(ar.isbn) > 0
-        """
-
-        result = conn.execute(count_query).fetchone()
-        to_insert = result[0] if result else 0
-
-        if to_insert == 0:
-            click.echo("No historical titles need backfilling.")
-            conn.close()
-            return
-
-        click.echo(f"Found {to_insert} historical ISBNs without book records")
-        click.echo("Inserting stub records (duplicates will be skipped)...")
-
-        conn.execute(query)
-        conn.close()
+        with _db().get_pool().acquire() as conn:
+            # Find titles in all_rankings that don't have book records
+            # Get unique ISBN -> title/author mappings, avoiding ISBN conflicts
+            query = """
+                INSERT OR IGNORE INTO books (primary_isbn13, title, author)
+                SELECT DISTINCT
+                    ar.isbn as primary_isbn13,
+                    ar.title,
+                    ar.author
+                FROM all_rankings ar
+                LEFT JOIN books b ON ar.isbn = b.primary_isbn13
+                WHERE b.primary_isbn13 IS NULL
+                  AND ar.isbn IS NOT NULL
+                  AND LENGTH(ar.isbn) > 0
+            """
+
+            # First count how many unique ISBNs are missing
+            count_query = """
+                SELECT COUNT(DISTINCT ar.isbn) as cnt
+                FROM all_rankings ar
+                LEFT JOIN books b ON ar.isbn = b.primary_isbn13
+                WHERE b.primary_isbn13 IS NULL
+                  AND ar.isbn IS NOT NULL
+                  AND LENGTH(ar.isbn) > 0
+            """
+
+            result = conn.execute(count_query).fetchone()
+            to_insert = result[0] if result else 0
+
+            if to_insert == 0:
+                click.echo("No historical titles need backfilling.")
+                return
+
+            click.echo(f"Found {to_insert} historical ISBNs without book records")
+            click.echo("Inserting stub records (duplicates will be skipped)...")
+
+            conn.execute(query)
 
         click.echo(f"Successfully created {to_insert} stub book records.")
         click.echo()
@@ -573,9 +651,8 @@ def backfill_books():
 def status():
     """Show sync status and statistics."""
     try:
-        conn = db.get_connection()
-        stats = db.get_stats(conn)
-        conn.close()
+        with _db().get_pool().acquire() as conn:
+            stats = _db().get_stats(conn)
 
         click.echo("=== NYTimes Best Seller Tracker Status ===")
         click.echo(f"Lists tracked: {stats['lists_count']}")
@@ -1,31 +1,201 @@
 """Database operations for MotherDuck/DuckDB."""
 
+import atexit
 import os
-from typing import Optional
+import queue
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, Optional
 
 import duckdb
 
+try:
+    import pyarrow as pa
+except ImportError:  # optional: batch upserts fall back to executemany
+    pa = None
+
 from .models import BestSellerList, Book, Ranking
 
+BOOK_COLUMNS = (
+    "primary_isbn13", "primary_isbn10", "title", "author", "publisher",
+    "description", "book_image", "amazon_product_url",
+)
+RANKING_COLUMNS = (
+    "id", "list_name_encoded", "published_date", "rank", "rank_last_week",
+    "weeks_on_list", "primary_isbn13",
+)
+
+# Batches smaller than this are inserted with one multi-row VALUES statement
+# rather than staged through Arrow
+VALUES_BATCH_SIZE = 500
+
+# Column types for the historical CSV, matched by header name. This skips type
+# detection only; DuckDB still sniffs the delimiter and header row
+HISTORICAL_CSV_TYPES = """{
+    'title_id': 'INTEGER', 'week': 'DATE', 'year': 'INTEGER', 'rank': 'INTEGER',
+    'title': 'VARCHAR', 'author': 'VARCHAR',
+    'author_authorized_heading': 'VARCHAR', 'author_lccn': 'VARCHAR',
+    'author_viaf': 'VARCHAR', 'author_wikidata': 'VARCHAR',
+    'oclc_isbn': 'VARCHAR', 'oclc_owi': 'DOUBLE',
+    'oclc_holdings': 'DOUBLE', 'oclc_eholdings': 'DOUBLE'
+}"""
+
+# The CSV path is the only parameter, so every import runs the same statement
+HISTORICAL_IMPORT_SQL = f"""
+    INSERT OR IGNORE INTO historical_rankings (
+        title_id, week, year, rank, title, author,
+        author_authorized_heading, author_lccn, author_viaf, author_wikidata,
+        oclc_isbn, oclc_owi, oclc_holdings, oclc_eholdings
+    )
+    SELECT
+        s.title_id,
+        s.week,
+        s.year,
+        s.rank,
+        s.title,
+        s.author,
+        s.author_authorized_heading,
+        s.author_lccn,
+        s.author_viaf,
+        s.author_wikidata,
+        s.oclc_isbn,
+        s.oclc_owi,
+        s.oclc_holdings,
+        s.oclc_eholdings
+    FROM read_csv(?, header=true, types={HISTORICAL_CSV_TYPES}) s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM historical_rankings h
+        WHERE h.title_id = s.title_id AND h.week = s.week
+    )
+"""
 
-def get_connection(database: Optional[str] = None) -> duckdb.DuckDBPyConnection:
+
+def get_connection(
+    database: Optional[str] = None, token: Optional[str] = None
+) -> duckdb.DuckDBPyConnection:
     """
     Get a connection to MotherDuck.
 
+    The MotherDuck database handle is opened once per (database, token) and
+    cached; each call returns a new cursor on it, so callers skip the
+    auth/attach handshake and closing the returned connection leaves the
+    shared handle open for the next caller.
+
     Args:
         database: Database name. If not provided, uses MOTHERDUCK_DATABASE env var.
+        token: MotherDuck token. If not provided, uses MOTHERDUCK_TOKEN env var.
 
     Returns:
         DuckDB connection to MotherDuck.
     """
-    token = os.environ.get("MOTHERDUCK_TOKEN")
+    token = token or os.environ.get("MOTHERDUCK_TOKEN")
     if not token:
         raise ValueError("MOTHERDUCK_TOKEN environment variable is required")
 
     db_name = database or os.environ.get("MOTHERDUCK_DATABASE", "nyt_bestsellers")
-    connection_string = f"md:{db_name}?motherduck_token={token}"
 
-    return duckdb.connect(connection_string)
+    return _connect(db_name, token).cursor()
+
+
+_handles: list[duckdb.DuckDBPyConnection] = []
+
+
+@lru_cache(maxsize=4)
+def _connect(db_name: str, token: str) -> duckdb.DuckDBPyConnection:
+    """Open (once) the MotherDuck database handle shared by get_connection."""
+    conn = duckdb.connect(f"md:{db_name}?motherduck_token={token}")
+    # Cache remote file metadata so repeated scans skip HTTP round-trips
+    conn.execute("SET enable_http_metadata_cache = true")
+    _handles.append(conn)
+    return conn
+
+
+def close_all() -> None:
+    """Close pooled connections and the cached MotherDuck database handles."""
+    if _pool is not None:
+        _pool.close_all()
+    _connect.cache_clear()
+    while _handles:
+        _handles.pop().close()
+
+
+atexit.register(close_all)
+
+
+class DatabaseConnectionPool:
+    """
+    A small pool of MotherDuck connections shared within one process.
+
+    Connections are opened lazily and handed back to the pool after use, so
+    repeated work in the same process reuses an authenticated connection
+    instead of paying the MotherDuck handshake again. A connection is only
+    used by one caller at a time, since DuckDB connections are not meant to
+    be shared across threads.
+    """
+
+    def __init__(self, max_connections: int = 4, database: Optional[str] = None):
+        self.max_connections = max_connections
+        self.database = database
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    @contextmanager
+    def acquire(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """
+        Borrow a connection for the duration of a ``with`` block.
+
+        Blocks while ``max_connections`` connections are already in use. A
+        connection whose block raised is closed rather than returned, since it
+        may be left in an aborted transaction.
+        """
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = get_connection(self.database)
+
+            try:
+                yield conn
+            except BaseException:
+                conn.close()
+                raise
+            self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close_all(self) -> None:
+        """Close every idle connection in the pool."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pool: Optional[DatabaseConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> DatabaseConnectionPool:
+    """
+    Get the process-wide connection pool, creating it on first use.
+
+    The pool size comes from the MOTHERDUCK_MAX_CONNECTIONS env var (default 4).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            max_connections = int(os.environ.get("MOTHERDUCK_MAX_CONNECTIONS", "4"))
+            _pool = DatabaseConnectionPool(max_connections)
+        return _pool
+
+
+def _values_placeholders(width: int, rows: int) -> str:
+    """Build a multi-row VALUES placeholder list, e.g. ``(?, ?), (?, ?)``."""
+    row = "(" + ", ".join(["?"] * width) + ")"
+    return ", ".join([row] * rows)
 
 
 def init_schema(conn: duckdb.DuckDBPyConnection) -> None:
@@ -91,6 +261,32 @@ def upsert_list(conn: duckdb.DuckDBPyConnection, lst: BestSellerList) -> None:
     )
 
 
+def upsert_lists_batch(conn: duckdb.DuckDBPyConnection, lists: list[BestSellerList]) -> None:
+    """Insert or update multiple Best Seller lists in a single statement."""
+    if not lists:
+        return
+
+    conn.execute(
+        f"""
+        INSERT OR REPLACE INTO lists (
+            list_name_encoded, display_name, oldest_published_date,
+            newest_published_date, updated
+        ) VALUES {_values_placeholders(5, len(lists))}
+        """,
+        [
+            value
+            for lst in lists
+            for value in (
+                lst.list_name_encoded,
+                lst.display_name,
+                lst.oldest_published_date,
+                lst.newest_published_date,
+                lst.updated,
+            )
+        ],
+    )
+
+
 def upsert_book(conn: duckdb.DuckDBPyConnection, book: Book) -> None:
     """Insert or update a book."""
     conn.execute(
@@ -139,27 +335,8 @@ def upsert_books_batch(conn: duckdb.DuckDBPyConnection, books: list[Book]) -> No
     if not books:
         return
 
-    conn.executemany(
-        """
-        INSERT OR REPLACE INTO books (
-            primary_isbn13, primary_isbn10, title, author, publisher,
-            description, book_image, amazon_product_url
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        [
-            (
-                book.primary_isbn13,
-                book.primary_isbn10,
-                book.title,
-                book.author,
-                book.publisher,
-                book.description,
-                book.book_image,
-                book.amazon_product_url,
-            )
-            for book in books
-        ],
-    )
+    with _txn(conn):
+        _bulk_insert_or_replace(conn, "books", BOOK_COLUMNS, _book_rows(books))
 
 
 def upsert_rankings_batch(conn: duckdb.DuckDBPyConnection, rankings: list[Ranking]) -> None:
@@ -167,39 +344,168 @@ def upsert_rankings_batch(conn: duckdb.DuckDBPyConnection, rankings: list[Rankin
     if not rankings:
         return
 
-    conn.executemany(
-        """
-        INSERT OR REPLACE INTO rankings (
-            id, list_name_encoded, published_date, rank, rank_last_week,
-            weeks_on_list, primary_isbn13
-        ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        """,
-        [
-            (
-                ranking.id,
-                ranking.list_name_encoded,
-                ranking.published_date,
-                ranking.rank,
-                ranking.rank_last_week,
-                ranking.weeks_on_list,
-                ranking.primary_isbn13,
+    with _txn(conn):
+        _bulk_insert_or_replace(conn, "rankings", RANKING_COLUMNS, _ranking_rows(rankings))
+
+
+@contextmanager
+def _txn(conn: duckdb.DuckDBPyConnection) -> Iterator[None]:
+    """Run the enclosed statements in one transaction, rolling back on error."""
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        yield
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _book_rows(books: list[Book]) -> list[tuple]:
+    """Convert books to row tuples in BOOK_COLUMNS order."""
+    return [
+        (
+            book.primary_isbn13,
+            book.primary_isbn10,
+            book.title,
+            book.author,
+            book.publisher,
+            book.description,
+            book.book_image,
+            book.amazon_product_url,
+        )
+        for book in books
+    ]
+
+
+def _ranking_rows(rankings: list[Ranking]) -> list[tuple]:
+    """Convert rankings to row tuples in RANKING_COLUMNS order."""
+    return [
+        (
+            ranking.id,
+            ranking.list_name_encoded,
+            ranking.published_date,
+            ranking.rank,
+            ranking.rank_last_week,
+            ranking.weeks_on_list,
+            ranking.primary_isbn13,
+        )
+        for ranking in rankings
+    ]
+
+
+def _bulk_insert_or_replace(
+    conn: duckdb.DuckDBPyConnection,
+    table: str,
+    columns: tuple[str, ...],
+    rows: list[tuple],
+) -> None:
+    """
+    INSERT OR REPLACE rows into a table.
+
+    Batches under VALUES_BATCH_SIZE rows are sent as one multi-row VALUES
+    statement. Larger batches are registered as one Arrow table and written
+    with a single INSERT ... SELECT scan when pyarrow is installed, and
+    otherwise as VALUES statements of VALUES_BATCH_SIZE rows each.
+
+    The first column must be the table's primary key. Rows repeating a key
+    (the same book on several lists of one overview) are collapsed to the
+    last one, since a single statement cannot write a key twice.
+    """
+    column_list = ", ".join(columns)
+    rows = list({row[0]: row for row in rows}.values())
+
+    if pa is None or len(rows) < VALUES_BATCH_SIZE:
+        for start in range(0, len(rows), VALUES_BATCH_SIZE):
+            chunk = rows[start:start + VALUES_BATCH_SIZE]
+            conn.execute(
+                f"INSERT OR REPLACE INTO {table} ({column_list}) "
+                f"VALUES {_values_placeholders(len(columns), len(chunk))}",
+                [value for row in chunk for value in row],
             )
-            for ranking in rankings
-        ],
+        return
+
+    stage_name = f"{table}_stage"
+    stage = pa.table({name: list(values) for name, values in zip(columns, zip(*rows))})
+    conn.register(stage_name, stage)
+    try:
+        conn.execute(
+            f"INSERT OR REPLACE INTO {table} ({column_list}) SELECT {column_list} FROM {stage_name}"
+        )
+    finally:
+        conn.unregister(stage_name)
+
+
+def update_books_series_batch(
+    conn: duckdb.DuckDBPyConnection,
+    updates: list[tuple[str, str, Optional[int], Optional[str]]],
+) -> None:
+    """
+    Set series information on multiple books with a single UPDATE.
+
+    The rows are loaded into a temporary staging table and applied with one
+    UPDATE ... FROM, rather than issuing an UPDATE per book.
+
+    Args:
+        conn: DuckDB connection
+        updates: List of (primary_isbn13, series_name, series_position, wikidata_id) tuples
+    """
+    if not updates:
+        return
+
+    conn.execute("""
+        CREATE OR REPLACE TEMP TABLE stg_series (
+            primary_isbn13 VARCHAR,
+            series_name VARCHAR,
+            series_position INTEGER,
+            wikidata_id VARCHAR
+        )
+    """)
+    conn.execute(
+        f"INSERT INTO stg_series VALUES {_values_placeholders(4, len(updates))}",
+        [value for row in updates for value in row],
     )
+    conn.execute("""
+        UPDATE books
+        SET series_name = s.series_name,
+            series_position = s.series_position,
+            wikidata_id = s.wikidata_id
+        FROM stg_series s
+        WHERE books.primary_isbn13 = s.primary_isbn13
+    """)
+    conn.execute("DROP TABLE stg_series")
+
+
+def save_week(
+    conn: duckdb.DuckDBPyConnection,
+    books: list[Book],
+    rankings: list[Ranking],
+    lists: Optional[list[BestSellerList]] = None,
+) -> None:
+    """
+    Save one API response's lists, books, and rankings in a single transaction.
+
+    Committing once per response instead of once per statement keeps the
+    writes for a week together and saves a commit round-trip per table.
+    """
+    with _txn(conn):
+        if lists:
+            upsert_lists_batch(conn, lists)
+        if books:
+            _bulk_insert_or_replace(conn, "books", BOOK_COLUMNS, _book_rows(books))
+        if rankings:
+            _bulk_insert_or_replace(conn, "rankings", RANKING_COLUMNS, _ranking_rows(rankings))
 
 
 def get_stats(conn: duckdb.DuckDBPyConnection) -> dict:
     """Get statistics about the stored data."""
-    lists_count = conn.execute("SELECT COUNT(*) FROM lists").fetchone()[0]
-    books_count = conn.execute("SELECT COUNT(*) FROM books").fetchone()[0]
-    rankings_count = conn.execute("SELECT COUNT(*) FROM rankings").fetchone()[0]
-
-    # Get date range of rankings
-    date_range = conn.execute(
+    lists_count, books_count, rankings_count, oldest, newest = conn.execute(
         """
-        SELECT MIN(published_date), MAX(published_date)
-        FROM rankings
+        SELECT
+            (SELECT COUNT(*) FROM lists),
+            (SELECT COUNT(*) FROM books),
+            (SELECT COUNT(*) FROM rankings),
+            (SELECT MIN(published_date) FROM rankings),
+            (SELECT MAX(published_date) FROM rankings)
         """
     ).fetchone()
 
@@ -207,15 +513,32 @@ def get_stats(conn: duckdb.DuckDBPyConnection) -> dict:
         "lists_count": lists_count,
         "books_count": books_count,
         "rankings_count": rankings_count,
-        "oldest_ranking_date": date_range[0] if date_range else None,
-        "newest_ranking_date": date_range[1] if date_range else None,
+        "oldest_ranking_date": oldest,
+        "newest_ranking_date": newest,
     }
 
 
+def fetch_columns(result: duckdb.DuckDBPyConnection) -> list[list]:
+    """
+    Fetch an executed query's result as one Python list per column.
+
+    With pyarrow installed the result is transferred as a columnar Arrow table
+    instead of being built up as one Python tuple per row.
+    """
+    if pa is None:
+        rows = result.fetchall()
+        if not rows:
+            return [[] for _ in result.description]
+        return [list(column) for column in zip(*rows)]
+
+    table = result.fetch_arrow_table()
+    return [column.to_pylist() for column in table.columns]
+
+
 def get_all_list_names(conn: duckdb.DuckDBPyConnection) -> list[str]:
     """Get all stored list names."""
-    result = conn.execute("SELECT list_name_encoded FROM lists").fetchall()
-    return [row[0] for row in result]
+    (names,) = fetch_columns(conn.execute("SELECT list_name_encoded FROM lists"))
+    return names
 
 
 def init_unified_view(conn: duckdb.DuckDBPyConnection) -> None:
@@ -286,13 +609,20 @@ def init_historical_schema(conn: duckdb.DuckDBPyConnection) -> None:
     """)
 
 
-def import_historical_csv(conn: duckdb.DuckDBPyConnection, csv_path: str) -> dict:
+def import_historical_csv(
+    conn: duckdb.DuckDBPyConnection, csv_path: str, threads: Optional[int] = None
+) -> dict:
     """
     Import historical bestseller data from a CSV file, skipping duplicates.
 
+    The CSV is parsed by DuckDB's parallel reader and rows already present in
+    historical_rankings are filtered out with an anti-join, so re-importing a
+    file does not pay a conflict check for every existing row.
+
     Args:
         conn: DuckDB connection
         csv_path: Path to the CSV file
+        threads: Number of DuckDB threads to use. Defaults to DuckDB's setting.
 
     Returns:
         Dictionary with import statistics
@@ -300,47 +630,46 @@ def import_historical_csv(conn: duckdb.DuckDBPyConnection, csv_path: str) -> dic
     # First, ensure the table exists
     init_historical_schema(conn)
 
-    # Count existing records
-    before_count = conn.execute("SELECT COUNT(*) FROM historical_rankings").fetchone()[0]
+    before_count, _, _ = _historical_stats(conn)
 
-    # Use INSERT OR IGNORE to skip duplicates (based on primary key: title_id, week)
-    conn.execute(f"""
-        INSERT OR IGNORE INTO historical_rankings (
-            title_id, week, year, rank, title, author,
-            author_authorized_heading, author_lccn, author_viaf, author_wikidata,
-            oclc_isbn, oclc_owi, oclc_holdings, oclc_eholdings
-        )
-        SELECT
-            title_id,
-            week::DATE,
-            year,
-            rank,
-            title,
-            author,
-            author_authorized_heading,
-            author_lccn,
-            author_viaf,
-            author_wikidata,
-            oclc_isbn,
-            oclc_owi,
-            oclc_holdings,
-            oclc_eholdings
-        FROM read_csv('{csv_path}', header=true, auto_detect=true)
-    """)
-
-    # Count after insert
-    after_count = conn.execute("SELECT COUNT(*) FROM historical_rankings").fetchone()[0]
-    new_records = after_count - before_count
+    # Skip rows already stored (primary key: title_id, week); INSERT OR IGNORE
+    # still covers duplicates within the file itself
+    with _threads(conn, threads):
+        conn.execute(HISTORICAL_IMPORT_SQL, [csv_path])
 
-    # Get date range
-    date_range = conn.execute("""
-        SELECT MIN(week), MAX(week) FROM historical_rankings
-    """).fetchone()
+    after_count, oldest_date, newest_date = _historical_stats(conn)
 
     return {
         "records_before": before_count,
         "records_after": after_count,
-        "new_records": new_records,
-        "oldest_date": date_range[0],
-        "newest_date": date_range[1],
+        "new_records": after_count - before_count,
+        "oldest_date": oldest_date,
+        "newest_date": newest_date,
     }
+
+
+@contextmanager
+def _threads(conn: duckdb.DuckDBPyConnection, threads: Optional[int]) -> Iterator[None]:
+    """
+    Run the enclosed statements with a given DuckDB thread count.
+
+    The setting belongs to the shared database handle rather than the cursor,
+    so the previous value is restored afterwards.
+    """
+    if not threads:
+        yield
+        return
+
+    previous = conn.execute("SELECT current_setting('threads')").fetchone()[0]
+    conn.execute(f"SET threads = {int(threads)}")
+    try:
+        yield
+    finally:
+        conn.execute(f"SET threads = {int(previous)}")
+
+
+def _historical_stats(conn: duckdb.DuckDBPyConnection) -> tuple:
+    """Row count and oldest/newest week of historical_rankings, in one scan."""
+    return conn.execute(
+        "SELECT COUNT(*), MIN(week), MAX(week) FROM historical_rankings"
+    ).fetchone()
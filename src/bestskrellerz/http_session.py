@@ -0,0 +1,46 @@
+"""Shared HTTP session setup for the Wikidata clients."""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def build_session(
+    headers: dict[str, str],
+    pool_connections: int = 4,
+    pool_maxsize: int = 8,
+) -> requests.Session:
+    """
+    Create a keep-alive session with connection pooling and retries.
+
+    Reusing one session across requests skips the TCP/TLS handshake after the
+    first call. Transient failures (429 and 5xx gateway errors) are retried
+    with exponential backoff, waiting out any Retry-After the server sends.
+
+    Args:
+        headers: Default headers sent with every request
+        pool_connections: Number of per-host connection pools to cache
+        pool_maxsize: Maximum connections kept open per host
+
+    Returns:
+        Configured requests session
+    """
+    session = requests.Session()
+    session.headers.update(headers)
+
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 502, 503, 504],
+        respect_retry_after_header=True,
+        # POST is only used for read-only SPARQL queries, so it is safe to retry
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {"POST"},
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
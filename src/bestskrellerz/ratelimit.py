@@ -0,0 +1,28 @@
+"""Client-side request pacing shared by the API fetchers."""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Space calls at least ``min_interval`` seconds apart across threads.
+
+    Each call to ``acquire`` reserves the next free slot and sleeps until it
+    arrives, so concurrent workers together never exceed one request per
+    interval.
+    """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self) -> None:
+        """Block until the caller may make its next request."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
@@ -1,17 +1,49 @@
 """Enrich book data with series information from Wikidata."""
 
-import os
-import time
+import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 
 import duckdb
 import requests
 
+from .cache import MISSING, DiskCache, default_cache_dir
+from .db import fetch_columns, get_connection
+from .http_session import build_session
+from .ratelimit import RateLimiter
+from .wikidata import parse_ordinal, query_wikidata_batch_by_title
+
+log = logging.getLogger(__name__)
+
 
 WIKIDATA_SPARQL_ENDPOINT = "https://query.wikidata.org/sparql"
-REQUEST_DELAY = 1.0  # Be nice to Wikidata - 1 second between requests
+REQUEST_DELAY = 1.0  # Be nice to Wikidata - 1 second between request starts
+BATCH_SIZE = 50  # Titles per batched Wikidata label query
+MAX_WORKERS = 4  # Concurrent Wikidata requests (Wikidata allows up to 5)
+
+HEADERS = {
+    "User-Agent": "NYTBestsellersEnrichment/1.0"
+}
+
+# Shared by all worker threads so request starts stay REQUEST_DELAY apart
+_LIMITER = RateLimiter(REQUEST_DELAY)
+
+# Reused for every request so connections stay open between queries
+_SESSION = build_session(HEADERS)
+
+# Search and entity lookups are deterministic, so repeat runs read them from
+# disk (including "no hit" results) instead of going back to Wikidata
+_CACHE = DiskCache(default_cache_dir() / "series_enrichment.sqlite")
+
+
+# Title normalization patterns, compiled once at import: one pass drops the
+# ": A Novel" suffix and parentheticals, a second turns every run of
+# punctuation/whitespace into a single space
+_STRIP_RE = re.compile(r'\s*:\s*a novel.*$|\s*\(.*?\)\s*', re.IGNORECASE)
+_NON_WORD_RE = re.compile(r'\W+')
 
 
 @dataclass
@@ -25,14 +57,12 @@ class SeriesInfo:
     wikidata_series_id: str
 
 
+@lru_cache(maxsize=8192)
 def normalize_title(title: str) -> str:
     """Normalize a title for matching."""
     # Remove common subtitles and punctuation
-    title = title.lower()
-    title = re.sub(r'\s*:\s*a novel.*$', '', title, flags=re.IGNORECASE)
-    title = re.sub(r'\s*\(.*?\)\s*', ' ', title)
-    title = re.sub(r'[^\w\s]', ' ', title)
-    title = re.sub(r'\s+', ' ', title).strip()
+    title = _STRIP_RE.sub(' ', title.lower())
+    title = _NON_WORD_RE.sub(' ', title).strip()
     # Truncate very long titles to first 50 chars for faster queries
     if len(title) > 50:
         # Try to cut at a word boundary
@@ -52,8 +82,14 @@ def search_wikidata_entities(title: str) -> list[str]:
     """
     search_title = normalize_title(title)
 
+    cache_key = f"search:{search_title}"
+    cached = _CACHE.get(cache_key)
+    if cached is not MISSING:
+        return cached
+
     try:
-        response = requests.get(
+        _LIMITER.acquire()
+        response = _SESSION.get(
             "https://www.wikidata.org/w/api.php",
             params={
                 "action": "wbsearchentities",
@@ -62,16 +98,15 @@ def search_wikidata_entities(title: str) -> list[str]:
                 "format": "json",
                 "limit": 5
             },
-            headers={
-                "User-Agent": "NYTBestsellersEnrichment/1.0"
-            },
             timeout=30
         )
         response.raise_for_status()
         data = response.json()
 
         results = data.get("search", [])
-        return [r.get("id") for r in results if r.get("id")]
+        entity_ids = [r.get("id") for r in results if r.get("id")]
+        _CACHE.set(cache_key, entity_ids)
+        return entity_ids
 
     except requests.RequestException:
         return []
@@ -89,6 +124,11 @@ def get_series_info_for_entity(entity_id: str) -> Optional[tuple[str, str, Optio
     Returns:
         Tuple of (series_name, series_id, ordinal, book_entity_id) if in a series, None otherwise
     """
+    cache_key = f"series:{entity_id}"
+    cached = _CACHE.get(cache_key)
+    if cached is not MISSING:
+        return tuple(cached) if cached else None
+
     # Query that handles both direct series links and edition->work->series
     query = f"""
     SELECT ?item ?series ?seriesLabel ?ordinal WHERE {{
@@ -115,13 +155,11 @@ def get_series_info_for_entity(entity_id: str) -> Optional[tuple[str, str, Optio
     """
 
     try:
-        response = requests.get(
+        _LIMITER.acquire()
+        response = _SESSION.get(
             WIKIDATA_SPARQL_ENDPOINT,
             params={"query": query},
-            headers={
-                "Accept": "application/json",
-                "User-Agent": "NYTBestsellersEnrichment/1.0"
-            },
+            headers={"Accept": "application/json"},
             timeout=30
         )
         response.raise_for_status()
@@ -129,6 +167,7 @@ def get_series_info_for_entity(entity_id: str) -> Optional[tuple[str, str, Optio
 
         bindings = data.get("results", {}).get("bindings", [])
         if not bindings:
+            _CACHE.set(cache_key, None)
             return None
 
         result = bindings[0]
@@ -139,16 +178,12 @@ def get_series_info_for_entity(entity_id: str) -> Optional[tuple[str, str, Optio
 
         # Skip if series label is just the Q-number (means no English label)
         if series_label.startswith("Q") and series_label[1:].isdigit():
+            _CACHE.set(cache_key, None)
             return None
 
-        ordinal_int = None
-        if ordinal:
-            try:
-                ordinal_int = int(float(ordinal))
-            except ValueError:
-                pass
-
-        return (series_label, series_id, ordinal_int, item_id)
+        series_info = (series_label, series_id, parse_ordinal(ordinal), item_id)
+        _CACHE.set(cache_key, series_info)
+        return series_info
 
     except requests.RequestException:
         return None
@@ -174,7 +209,7 @@ def query_wikidata_for_series(title: str, author: str) -> Optional[SeriesInfo]:
     if not entity_ids:
         return None
 
-    # Step 2: Try each entity until we find one with series info
+    # Step 2: Check each candidate, stopping at the first with a series
     for entity_id in entity_ids:
         series_info = get_series_info_for_entity(entity_id)
         if series_info:
@@ -191,15 +226,43 @@ def query_wikidata_for_series(title: str, author: str) -> Optional[SeriesInfo]:
     return None
 
 
-def get_unique_books(conn: duckdb.DuckDBPyConnection) -> list[tuple[str, str]]:
-    """Get unique title/author pairs from the database."""
+def get_unique_books(
+    conn: duckdb.DuckDBPyConnection,
+    skip_existing: bool = False,
+    limit: Optional[int] = None
+) -> list[tuple[str, str]]:
+    """
+    Get unique title/author pairs from the database.
+
+    With skip_existing, pairs already in book_series are dropped by an
+    anti-join in the query, so only un-enriched rows are transferred.
+    """
     result = conn.execute("""
-        SELECT DISTINCT title, author
-        FROM nyt_bestsellers.main.all_rankings
-        WHERE title IS NOT NULL AND author IS NOT NULL
-        ORDER BY title
-    """).fetchall()
-    return result
+        SELECT DISTINCT r.title, r.author
+        FROM nyt_bestsellers.main.all_rankings r
+        LEFT JOIN nyt_bestsellers.main.book_series s
+            ON s.title = r.title AND s.author = r.author
+        WHERE r.title IS NOT NULL AND r.author IS NOT NULL
+        AND (NOT ? OR s.title IS NULL)
+        ORDER BY r.title
+        LIMIT COALESCE(?, 9223372036854775807)
+    """, [skip_existing, limit])
+    titles, authors = fetch_columns(result)
+    return list(zip(titles, authors))
+
+
+def count_books(conn: duckdb.DuckDBPyConnection) -> tuple[int, int]:
+    """Count unique title/author pairs and how many of them are already enriched."""
+    return conn.execute("""
+        SELECT COUNT(*), COUNT(s.title)
+        FROM (
+            SELECT DISTINCT title, author
+            FROM nyt_bestsellers.main.all_rankings
+            WHERE title IS NOT NULL AND author IS NOT NULL
+        ) r
+        LEFT JOIN nyt_bestsellers.main.book_series s
+            ON s.title = r.title AND s.author = r.author
+    """).fetchone()
 
 
 def create_series_table(conn: duckdb.DuckDBPyConnection) -> None:
@@ -234,6 +297,30 @@ def save_series_info(conn: duckdb.DuckDBPyConnection, info: SeriesInfo) -> None:
     ])
 
 
+def save_series_info_batch(conn: duckdb.DuckDBPyConnection, infos: list[SeriesInfo]) -> None:
+    """Save multiple series records to the database in a single statement."""
+    if not infos:
+        return
+
+    placeholders = ", ".join(["(?, ?, ?, ?, ?, ?)"] * len(infos))
+    conn.execute(f"""
+        INSERT OR REPLACE INTO nyt_bestsellers.main.book_series
+        (title, author, series_name, series_order, wikidata_book_id, wikidata_series_id)
+        VALUES {placeholders}
+    """, [
+        value
+        for info in infos
+        for value in (
+            info.title,
+            info.author,
+            info.series_name,
+            info.series_order,
+            info.wikidata_book_id,
+            info.wikidata_series_id
+        )
+    ])
+
+
 def enrich_books_with_series(
     token: Optional[str] = None,
     database: str = "nyt_bestsellers",
@@ -246,82 +333,96 @@ def enrich_books_with_series(
     Args:
         token: MotherDuck token (uses MOTHERDUCK_TOKEN env var if not provided)
         database: Database name
-        limit: Maximum number of books to process (for testing)
+        limit: Maximum number of books to process (for testing). Counted
+            after skipping, so with skip_existing each run takes the next
+            un-enriched books.
         skip_existing: Skip books already in book_series table
 
     Returns:
-        Dict with stats about the enrichment process
+        Dict with stats about the enrichment process. total_pairs is every
+        distinct title/author pair in the rankings, and skipped is how many
+        of them were already enriched, regardless of limit.
     """
-    token = token or os.environ.get("MOTHERDUCK_TOKEN")
-    if not token:
-        raise ValueError("MOTHERDUCK_TOKEN environment variable is required")
-
-    # Connect to MotherDuck
-    conn = duckdb.connect(f"md:{database}?motherduck_token={token}")
+    # Connect to MotherDuck (reuses the cached database handle)
+    conn = get_connection(database, token)
 
     # Create series table
     create_series_table(conn)
 
-    # Get unique books
-    books = get_unique_books(conn)
-    print(f"Found {len(books)} unique title/author combinations")
-
-    if limit:
-        books = books[:limit]
-        print(f"Processing first {limit} books")
+    # Get unique books, leaving out already enriched ones in the query itself
+    total, enriched = count_books(conn)
+    log.info("Found %d unique title/author combinations", total)
 
-    # Get existing entries if skipping
-    existing = set()
     if skip_existing:
-        existing_result = conn.execute("""
-            SELECT title, author FROM nyt_bestsellers.main.book_series
-        """).fetchall()
-        existing = {(row[0], row[1]) for row in existing_result}
-        print(f"Skipping {len(existing)} already enriched books")
+        log.info("Skipping %d already enriched books", enriched)
+
+    books = get_unique_books(conn, skip_existing, limit)
+    if limit:
+        log.info("Processing at most %d books", limit)
 
     stats = {
-        "total": len(books),
+        "total_pairs": total,
         "processed": 0,
         "found_series": 0,
-        "skipped": 0,
+        "skipped": enriched if skip_existing else 0,
         "errors": 0
     }
 
-    for i, (title, author) in enumerate(books):
-        if (title, author) in existing:
-            stats["skipped"] += 1
-            continue
-
-        print(f"[{i+1}/{len(books)}] Processing: {title[:50]}...")
-
-        try:
-            series_info = query_wikidata_for_series(title, author)
-
-            if series_info:
-                save_series_info(conn, series_info)
-                order_str = f" (Book {series_info.series_order})" if series_info.series_order else ""
-                print(f"  Found: {series_info.series_name}{order_str}")
-                stats["found_series"] += 1
-            else:
-                print(f"  No series found")
-
-            stats["processed"] += 1
-
-        except Exception as e:
-            print(f"  Error: {e}")
-            stats["errors"] += 1
-
-        # Rate limiting
-        time.sleep(REQUEST_DELAY)
+    # Look titles up in batches with one VALUES query each, falling back to
+    # the per-title entity search (run concurrently) only for titles the
+    # batch did not match
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        for start in range(0, len(books), BATCH_SIZE):
+            chunk = books[start:start + BATCH_SIZE]
+            log.info("[%d-%d/%d] Querying %d titles...", start + 1, start + len(chunk), len(books), len(chunk))
+
+            _LIMITER.acquire()
+            batch_results = query_wikidata_batch_by_title([title for title, _ in chunk])
+
+            fallbacks = {
+                (title, author): pool.submit(query_wikidata_for_series, title, author)
+                for title, author in chunk
+                if title not in batch_results
+            }
+            found = []
+
+            for title, author in chunk:
+                match = batch_results.get(title)
+                try:
+                    if match:
+                        series_info = SeriesInfo(
+                            title=title,
+                            author=author,
+                            series_name=match.series_name,
+                            series_order=match.series_position,
+                            wikidata_book_id=match.wikidata_id,
+                            wikidata_series_id=match.series_id
+                        )
+                    else:
+                        series_info = fallbacks[(title, author)].result()
+
+                    if series_info:
+                        found.append(series_info)
+                        if log.isEnabledFor(logging.DEBUG):
+                            order_str = f" (Book {series_info.series_order})" if series_info.series_order else ""
+                            log.debug("  Found: %s -> %s%s", title[:50], series_info.series_name, order_str)
+
+                    stats["processed"] += 1
+
+                except Exception as e:
+                    log.warning("  Error for %s: %s", title[:50], e)
+                    stats["errors"] += 1
+
+            save_series_info_batch(conn, found)
+            stats["found_series"] += len(found)
 
     conn.close()
 
-    print(f"\nEnrichment complete:")
-    print(f"  Total books: {stats['total']}")
-    print(f"  Processed: {stats['processed']}")
-    print(f"  Found series: {stats['found_series']}")
-    print(f"  Skipped (existing): {stats['skipped']}")
-    print(f"  Errors: {stats['errors']}")
+    log.info(
+        "Enrichment complete: %d title/author pairs, %d processed, %d found series, "
+        "%d already enriched, %d errors",
+        stats["total_pairs"], stats["processed"], stats["found_series"], stats["skipped"], stats["errors"],
+    )
 
     return stats
 
@@ -333,8 +434,10 @@ if __name__ == "__main__":
     parser.add_argument("--limit", type=int, help="Limit number of books to process")
     parser.add_argument("--no-skip", action="store_true", help="Don't skip existing entries")
     parser.add_argument("--database", default="nyt_bestsellers", help="Database name")
+    parser.add_argument("--verbose", action="store_true", help="Log every series match")
 
     args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s")
 
     enrich_books_with_series(
         database=args.database,
@@ -1,14 +1,43 @@
 """Fetch series information from Wikidata for books."""
 
+import json
 import re
-import time
-from typing import Optional
+from collections import defaultdict
+from functools import lru_cache
+from typing import Iterator, Optional
 import requests
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
+from urllib3.exceptions import HTTPError as TransportError
+
+try:
+    import ijson
+except ImportError:  # optional: batch responses are parsed in one piece instead
+    ijson = None
+
+from .cache import DiskCache, default_cache_dir, memoize
+from .http_session import build_session
+from .ratelimit import RateLimiter
 
 WIKIDATA_SPARQL_ENDPOINT = "https://query.wikidata.org/sparql"
 WIKIDATA_SEARCH_API = "https://www.wikidata.org/w/api.php"
 
+# Errors from parsing a batch response; ijson's do not derive from ValueError
+_PARSE_ERRORS = (KeyError, ValueError) + ((ijson.JSONError,) if ijson else ())
+
+# Shared default for missing SPARQL bindings
+_EMPTY: dict = {}
+
+# Search hits whose label differs from the title by more words are skipped
+MAX_WORD_COUNT_DELTA = 5
+
+# Maximum IDs accepted by one wbgetentities request
+WBGETENTITIES_LIMIT = 50
+
+# P31 classes accepted as books without a subclass check: literary work,
+# book, written work, novel, and version/edition. Other classes go through
+# _BOOK_TYPE_QUERY, which follows subclass-of (P279*) like the other queries.
+BOOK_CLASSES = frozenset({"Q7725634", "Q571", "Q47461344", "Q8261", "Q3331189"})
+
 # Common US/UK title substitutions
 TITLE_VARIATIONS = [
     ("Sorcerer's Stone", "Philosopher's Stone"),
@@ -25,6 +54,169 @@ HEADERS = {
     "Accept": "application/sparql-results+json"
 }
 
+# Reused for every request so connections stay open between queries. The
+# pool is sized for callers sharing the session across worker threads.
+_SESSION = build_session(HEADERS, pool_connections=20, pool_maxsize=20)
+
+# Lookup results persist across runs; misses are cached as well
+_CACHE = DiskCache(default_cache_dir() / "wikidata.sqlite")
+
+# Title-cased titles that no strategy matched in this process, so repeat
+# lookups (e.g. with another author) skip the search fallback entirely
+_MISSED_TITLES: set[str] = set()
+
+# Title normalization patterns, compiled once at import
+_TRAILING_PAREN_RE = re.compile(r'\s*\(.*?\)\s*$')
+_LEADING_ARTICLE_RE = re.compile(r'^(The|A|An)\s+', re.IGNORECASE)
+
+# Deletes hyphens and whitespace from ISBNs in one C-level pass
+_NODASH = str.maketrans("", "", "- \t\n")
+
+# TITLE_VARIATIONS as one alternation per direction, so a single scan finds
+# every term to swap. Several US spellings share a UK one; the first wins
+# when mapping back.
+_US_TO_UK = {us_term.lower(): uk_term for us_term, uk_term in TITLE_VARIATIONS}
+_UK_TO_US = {uk_term.lower(): us_term for us_term, uk_term in reversed(TITLE_VARIATIONS)}
+_US_RE = re.compile(
+    "|".join(re.escape(term) for term in sorted(_US_TO_UK, key=len, reverse=True)), re.IGNORECASE
+)
+_UK_RE = re.compile(
+    "|".join(re.escape(term) for term in sorted(_UK_TO_US, key=len, reverse=True)), re.IGNORECASE
+)
+
+
+# SPARQL query templates, filled in with %-formatting
+# Single-ISBN lookup; %(isbn_prop)s is wdt:P212 or wdt:P957
+_ISBN_QUERY = '''
+SELECT ?item ?itemLabel ?series ?seriesLabel ?position WHERE {
+  # Find book by ISBN
+  ?item %(isbn_prop)s "%(isbn)s" .
+
+  # Get series info - try direct series link first
+  OPTIONAL {
+    ?item wdt:P179 ?series .
+    OPTIONAL {
+      ?item p:P179 ?stmt .
+      ?stmt ps:P179 ?series ;
+            pq:P1545 ?position .
+    }
+  }
+
+  # Also try edition -> work -> series path
+  OPTIONAL {
+    ?item wdt:P629 ?work .  # edition of work
+    ?work wdt:P179 ?series .
+    OPTIONAL {
+      ?work p:P179 ?stmt .
+      ?stmt ps:P179 ?series ;
+            pq:P1545 ?position .
+    }
+  }
+
+  FILTER(BOUND(?series))
+  SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
+}
+LIMIT 1
+'''
+
+# Title variants by label or alternate label; %s is the VALUES rows
+_TITLE_VARIANTS_QUERY = '''
+SELECT ?title ?labelRank ?item ?itemLabel ?series ?seriesLabel ?position WHERE {
+  VALUES (?title) { %s }
+
+  # Match by label or alternate label
+  { ?item rdfs:label ?title . BIND(0 AS ?labelRank) }
+  UNION
+  { ?item skos:altLabel ?title . BIND(1 AS ?labelRank) }
+
+  # Filter to books/literary works
+  { ?item wdt:P31/wdt:P279* wd:Q7725634 . }
+  UNION
+  { ?item wdt:P31/wdt:P279* wd:Q571 . }
+  UNION
+  { ?item wdt:P31/wdt:P279* wd:Q47461344 . }
+
+  ?item wdt:P179 ?series .
+  OPTIONAL {
+    ?item p:P179 ?stmt .
+    ?stmt ps:P179 ?series ;
+          pq:P1545 ?position .
+  }
+  SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
+}
+'''
+
+# Batched ISBN-13/ISBN-10 lookup; %s is the VALUES list
+_BATCH_ISBN_QUERY = '''
+SELECT ?isbn ?item ?itemLabel ?series ?seriesLabel ?position WHERE {
+  VALUES ?isbn { %s }
+  { ?item wdt:P212 ?isbn . }
+  UNION
+  { ?item wdt:P957 ?isbn . }
+
+  {
+    ?item wdt:P179 ?series .
+    OPTIONAL {
+      ?item p:P179 ?stmt .
+      ?stmt ps:P179 ?series ;
+            pq:P1545 ?position .
+    }
+  }
+  UNION
+  {
+    ?item wdt:P629 ?work .
+    ?work wdt:P179 ?series .
+    OPTIONAL {
+      ?work p:P179 ?stmt .
+      ?stmt ps:P179 ?series ;
+            pq:P1545 ?position .
+    }
+  }
+
+  SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
+}
+'''
+
+# Batched title lookup; %s is the VALUES rows
+_BATCH_TITLE_QUERY = '''
+SELECT ?title ?item ?itemLabel ?series ?seriesLabel ?position WHERE {
+  VALUES (?title) { %s }
+
+  # Match by label or alternate label
+  { ?item rdfs:label ?title . }
+  UNION
+  { ?item skos:altLabel ?title . }
+
+  # Filter to books/literary works
+  { ?item wdt:P31/wdt:P279* wd:Q7725634 . }
+  UNION
+  { ?item wdt:P31/wdt:P279* wd:Q571 . }
+  UNION
+  { ?item wdt:P31/wdt:P279* wd:Q47461344 . }
+
+  ?item wdt:P179 ?series .
+  OPTIONAL {
+    ?item p:P179 ?stmt .
+    ?stmt ps:P179 ?series ;
+          pq:P1545 ?position .
+  }
+  SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
+}
+'''
+
+# Which of several items are books/literary works; %s is the VALUES list
+_BOOK_TYPE_QUERY = '''
+SELECT DISTINCT ?item WHERE {
+  VALUES ?item { %s }
+
+  { ?item wdt:P31/wdt:P279* wd:Q7725634 . }
+  UNION
+  { ?item wdt:P31/wdt:P279* wd:Q571 . }
+  UNION
+  { ?item wdt:P31/wdt:P279* wd:Q47461344 . }
+}
+'''
+
 
 @dataclass
 class SeriesInfo:
@@ -32,18 +224,21 @@ class SeriesInfo:
     wikidata_id: str
     series_name: str
     series_position: Optional[int]
+    series_id: Optional[str] = None
 
 
+@lru_cache(maxsize=8192)
 def normalize_title(title: str) -> str:
     """Normalize a book title for matching."""
     # Remove subtitle after colon
     title = title.split(":")[0].strip()
     # Remove common prefixes/suffixes
-    title = re.sub(r'\s*\(.*?\)\s*$', '', title)  # Remove parentheticals at end
-    title = re.sub(r'^(The|A|An)\s+', '', title, flags=re.IGNORECASE)  # Remove articles
+    title = _TRAILING_PAREN_RE.sub('', title)  # Remove parentheticals at end
+    title = _LEADING_ARTICLE_RE.sub('', title)  # Remove articles
     return title.strip()
 
 
+@lru_cache(maxsize=8192)
 def to_title_case(title: str) -> str:
     """Convert a title to proper title case for Wikidata matching."""
     words = title.lower().split()
@@ -57,22 +252,97 @@ def to_title_case(title: str) -> str:
     return ' '.join(result)
 
 
-def get_title_variations(title: str) -> list[str]:
+def _dump_series(info: Optional["SeriesInfo"]) -> Optional[dict]:
+    return asdict(info) if info else None
+
+
+def _load_series(data: Optional[dict]) -> Optional["SeriesInfo"]:
+    return SeriesInfo(**data) if data else None
+
+
+def _memoize_series(namespace: str):
+    """Persist a SeriesInfo lookup in the on-disk cache."""
+    return memoize(_CACHE, namespace, dump=_dump_series, load=_load_series)
+
+
+def invalidate(key: str, author: Optional[str] = None) -> None:
+    """
+    Forget cached lookups for an ISBN or title, so the next query refetches.
+
+    Args:
+        key: ISBN, or title as passed to query_wikidata_by_title
+        author: Author passed to query_wikidata_by_title along with the title
+    """
+    clean_isbn = key.translate(_NODASH).upper()
+    _query_by_isbn.invalidate(clean_isbn)
+
+    title_cased = to_title_case(key)
+    _MISSED_TITLES.discard(title_cased)
+    _query_by_title_variants.invalidate(get_title_variations(title_cased))
+    _search_wikidata.invalidate(title_cased, author)
+
+
+def parse_ordinal(ordinal: Optional[str]) -> Optional[int]:
+    """Parse a series ordinal such as "3" or "2.0"; None if not numeric."""
+    if not ordinal:
+        return None
+    whole = ordinal.partition(".")[0]
+    if whole.lstrip("-").isdecimal():
+        return int(whole)
+    return None
+
+
+def _sparql_literal(text: str) -> str:
+    """
+    Quote text as an English SPARQL string literal.
+
+    JSON string escapes are valid SPARQL escapes, so json.dumps handles
+    quotes, backslashes and control characters in one pass.
+    """
+    return json.dumps(text, ensure_ascii=False) + "@en"
+
+
+@lru_cache(maxsize=8192)
+def get_title_variations(title: str) -> tuple[str, ...]:
     """Generate US/UK title variations."""
     variations = [title]
-    title_lower = title.lower()
 
-    for us_term, uk_term in TITLE_VARIATIONS:
-        if us_term.lower() in title_lower:
-            # Add UK variation
-            variation = re.sub(re.escape(us_term), uk_term, title, flags=re.IGNORECASE)
-            variations.append(variation)
-        if uk_term.lower() in title_lower:
-            # Add US variation
-            variation = re.sub(re.escape(uk_term), us_term, title, flags=re.IGNORECASE)
-            variations.append(variation)
+    # Add UK variation
+    uk_variation = _US_RE.sub(lambda m: _US_TO_UK[m.group(0).lower()], title)
+    if uk_variation != title:
+        variations.append(uk_variation)
+
+    # Add US variation
+    us_variation = _UK_RE.sub(lambda m: _UK_TO_US[m.group(0).lower()], title)
+    if us_variation != title:
+        variations.append(us_variation)
+
+    return tuple(variations)
 
-    return variations
+
+def is_valid_isbn(clean_isbn: str) -> bool:
+    """
+    Check an ISBN-10 or ISBN-13 checksum.
+
+    Args:
+        clean_isbn: ISBN without hyphens or spaces, with any check digit X uppercased
+    """
+    if len(clean_isbn) == 13 and clean_isbn.isdecimal():
+        total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(clean_isbn))
+        return total % 10 == 0
+
+    if len(clean_isbn) == 10 and clean_isbn[:9].isdecimal():
+        check_digit = clean_isbn[9]
+        if check_digit == "X":
+            check = 10
+        elif check_digit.isdecimal():
+            check = int(check_digit)
+        else:
+            return False
+        total = sum(int(d) * (10 - i) for i, d in enumerate(clean_isbn[:9])) + check
+        return total % 11 == 0
+
+    return False
 
 
 def query_wikidata_by_isbn(isbn: str) -> Optional[SeriesInfo]:
@@ -89,66 +359,12 @@ def query_wikidata_by_isbn(isbn: str) -> Optional[SeriesInfo]:
         return None
 
     # Clean ISBN (remove hyphens)
-    clean_isbn = isbn.replace("-", "").strip()
-
-    # Determine property based on ISBN length
-    if len(clean_isbn) == 13:
-        isbn_prop = "wdt:P212"  # ISBN-13
-    elif len(clean_isbn) == 10:
-        isbn_prop = "wdt:P957"  # ISBN-10
-    else:
+    clean_isbn = isbn.translate(_NODASH).upper()
+    if not is_valid_isbn(clean_isbn):
         return None
 
-    query = f'''
-    SELECT ?item ?itemLabel ?series ?seriesLabel ?position WHERE {{
-      # Find book by ISBN
-      ?item {isbn_prop} "{clean_isbn}" .
-
-      # Get series info - try direct series link first
-      OPTIONAL {{
-        ?item wdt:P179 ?series .
-        OPTIONAL {{
-          ?item p:P179 ?stmt .
-          ?stmt ps:P179 ?series ;
-                pq:P1545 ?position .
-        }}
-      }}
-
-      # Also try edition -> work -> series path
-      OPTIONAL {{
-        ?item wdt:P629 ?work .  # edition of work
-        ?work wdt:P179 ?series .
-        OPTIONAL {{
-          ?work p:P179 ?stmt .
-          ?stmt ps:P179 ?series ;
-                pq:P1545 ?position .
-        }}
-      }}
-
-      FILTER(BOUND(?series))
-      SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en". }}
-    }}
-    LIMIT 1
-    '''
-
     try:
-        response = requests.get(
-            WIKIDATA_SPARQL_ENDPOINT,
-            params={"query": query, "format": "json"},
-            headers=HEADERS,
-            timeout=30
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        bindings = data.get("results", {}).get("bindings", [])
-
-        if bindings:
-            result = bindings[0]
-            return _parse_series_result(result)
-
-        return None
-
+        return _query_by_isbn(clean_isbn)
     except requests.exceptions.RequestException as e:
         print(f"ISBN lookup error for '{isbn}': {e}")
         return None
@@ -157,6 +373,29 @@ def query_wikidata_by_isbn(isbn: str) -> Optional[SeriesInfo]:
         return None
 
 
+@_memoize_series("isbn")
+def _query_by_isbn(clean_isbn: str) -> Optional[SeriesInfo]:
+    """Query by a cleaned ISBN-10 or ISBN-13."""
+    # Determine property based on ISBN length
+    isbn_prop = "wdt:P212" if len(clean_isbn) == 13 else "wdt:P957"  # ISBN-13 / ISBN-10
+
+    query = _ISBN_QUERY % {"isbn_prop": isbn_prop, "isbn": clean_isbn}
+
+    response = _SESSION.get(
+        WIKIDATA_SPARQL_ENDPOINT,
+        params={"query": query, "format": "json"},
+        timeout=30
+    )
+    response.raise_for_status()
+
+    data = response.json()
+    bindings = data.get("results", {}).get("bindings", [])
+
+    if bindings:
+        return _parse_series_result(bindings[0])
+    return None
+
+
 def query_wikidata_by_title(title: str, author: Optional[str] = None) -> Optional[SeriesInfo]:
     """
     Query Wikidata for series information using title.
@@ -169,114 +408,71 @@ def query_wikidata_by_title(title: str, author: Optional[str] = None) -> Optiona
     Returns:
         SeriesInfo if found, None otherwise
     """
-    # Try all title variations (US/UK spellings)
     title_cased = to_title_case(title)
-    variations = get_title_variations(title_cased)
-
-    for variant in variations:
-        result = _query_by_exact_title(variant)
-        if result:
-            return result
-
-        # Also try with alternate labels
-        result = _query_by_alt_label(variant)
-        if result:
-            return result
+    if title_cased in _MISSED_TITLES:
+        return None
 
-    # Fallback: try Wikidata search API
-    result = _search_wikidata(title_cased, author)
+    # Try all title variations (US/UK spellings), by label and alternate label
+    try:
+        result = _query_by_title_variants(get_title_variations(title_cased))
+        failed = False
+    except Exception:
+        result = None
+        failed = True
     if result:
         return result
 
-    return None
-
-
-def _query_by_exact_title(title: str) -> Optional[SeriesInfo]:
-    """Query using exact rdfs:label match."""
-    clean_title = title.replace('"', '\\"').replace("'", "\\'")
-
-    query = f'''
-    SELECT ?item ?itemLabel ?series ?seriesLabel ?position WHERE {{
-      ?item rdfs:label "{clean_title}"@en .
-      {{ ?item wdt:P31/wdt:P279* wd:Q7725634 . }}
-      UNION
-      {{ ?item wdt:P31/wdt:P279* wd:Q571 . }}
-      UNION
-      {{ ?item wdt:P31/wdt:P279* wd:Q47461344 . }}
-      ?item wdt:P179 ?series .
-      OPTIONAL {{
-        ?item p:P179 ?stmt .
-        ?stmt ps:P179 ?series ;
-              pq:P1545 ?position .
-      }}
-      SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en". }}
-    }}
-    LIMIT 1
-    '''
-
+    # Fallback: try Wikidata search API
     try:
-        response = requests.get(
-            WIKIDATA_SPARQL_ENDPOINT,
-            params={"query": query, "format": "json"},
-            headers=HEADERS,
-            timeout=30
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        bindings = data.get("results", {}).get("bindings", [])
-
-        if bindings:
-            return _parse_series_result(bindings[0])
-        return None
-
+        result = _search_wikidata(title_cased, author)
     except Exception:
         return None
 
+    # Only remember titles that every lookup answered without error
+    if result is None and not failed:
+        _MISSED_TITLES.add(title_cased)
+    return result
 
-def _query_by_alt_label(title: str) -> Optional[SeriesInfo]:
-    """Query using skos:altLabel (alternate names)."""
-    clean_title = title.replace('"', '\\"').replace("'", "\\'")
-
-    query = f'''
-    SELECT ?item ?itemLabel ?series ?seriesLabel ?position WHERE {{
-      ?item skos:altLabel "{clean_title}"@en .
-      {{ ?item wdt:P31/wdt:P279* wd:Q7725634 . }}
-      UNION
-      {{ ?item wdt:P31/wdt:P279* wd:Q571 . }}
-      UNION
-      {{ ?item wdt:P31/wdt:P279* wd:Q47461344 . }}
-      ?item wdt:P179 ?series .
-      OPTIONAL {{
-        ?item p:P179 ?stmt .
-        ?stmt ps:P179 ?series ;
-              pq:P1545 ?position .
-      }}
-      SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en". }}
-    }}
-    LIMIT 1
-    '''
 
-    try:
-        response = requests.get(
-            WIKIDATA_SPARQL_ENDPOINT,
-            params={"query": query, "format": "json"},
-            headers=HEADERS,
-            timeout=30
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        bindings = data.get("results", {}).get("bindings", [])
+@_memoize_series("title")
+def _query_by_title_variants(variants: tuple[str, ...]) -> Optional[SeriesInfo]:
+    """
+    Query every title variant by label and alternate label in one request.
 
-        if bindings:
-            return _parse_series_result(bindings[0])
-        return None
+    Returns the match for the earliest variant, preferring an exact label
+    over an alternate label for the same variant.
+    """
+    values_clause = " ".join([f"({_sparql_literal(variant)})" for variant in variants])
+
+    query = _TITLE_VARIANTS_QUERY % values_clause
+
+    response = _SESSION.get(
+        WIKIDATA_SPARQL_ENDPOINT,
+        params={"query": query, "format": "json"},
+        timeout=30
+    )
+    response.raise_for_status()
+
+    data = response.json()
+    bindings = data.get("results", {}).get("bindings", [])
+
+    variant_order = {variant: i for i, variant in reversed(list(enumerate(variants)))}
+    best = None
+    for result in bindings:
+        info = _parse_series_result(result)
+        if not info:
+            continue
+        rank = (
+            variant_order.get(result.get("title", {}).get("value"), len(variants)),
+            result.get("labelRank", {}).get("value", "1"),
+        )
+        if best is None or rank < best[0]:
+            best = (rank, info)
 
-    except Exception:
-        return None
+    return best[1] if best else None
 
 
+@_memoize_series("search")
 def _search_wikidata(title: str, author: Optional[str] = None) -> Optional[SeriesInfo]:
     """Use Wikidata search API for fuzzy matching, then check for series."""
     search_query = title
@@ -284,113 +480,189 @@ def _search_wikidata(title: str, author: Optional[str] = None) -> Optional[Serie
         # Add author to improve search accuracy
         search_query = f"{title} {author}"
 
-    try:
-        # Search for entities
-        response = requests.get(
+    # Search for entities
+    response = _SESSION.get(
+        WIKIDATA_SEARCH_API,
+        params={
+            "action": "wbsearchentities",
+            "search": search_query,
+            "language": "en",
+            "type": "item",
+            "limit": 5,
+            "format": "json"
+        },
+        timeout=30
+    )
+    response.raise_for_status()
+
+    data = response.json()
+    results = data.get("search", [])
+
+    # Drop hits whose label is far longer or shorter than the title, then
+    # check the rest most-similar first (ties keep search rank order)
+    title_words = title.lower().split()
+    title_word_set = set(title_words)
+    candidates = []
+    for item in results:
+        label_words = item.get("label", "").lower().split()
+        if item.get("id") and abs(len(label_words) - len(title_words)) <= MAX_WORD_COUNT_DELTA:
+            candidates.append((_jaccard(title_word_set, set(label_words)), item["id"]))
+    candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+    qids = [qid for _, qid in candidates]
+    return _series_for_entities(qids) if qids else None
+
+
+def _jaccard(a: set[str], b: set[str]) -> float:
+    """Token-set Jaccard similarity."""
+    union = a | b
+    return len(a & b) / len(union) if union else 0.0
+
+
+def _batch_get_entities(qids: list[str], props: str = "claims|labels") -> dict[str, dict]:
+    """
+    Fetch entities with the wbgetentities API, up to 50 IDs per request.
+
+    Returns:
+        Dict mapping QID to the entity JSON (missing entities are omitted)
+    """
+    entities = {}
+    for start in range(0, len(qids), WBGETENTITIES_LIMIT):
+        response = _SESSION.get(
             WIKIDATA_SEARCH_API,
             params={
-                "action": "wbsearchentities",
-                "search": search_query,
-                "language": "en",
-                "type": "item",
-                "limit": 5,
+                "action": "wbgetentities",
+                "ids": "|".join(qids[start:start + WBGETENTITIES_LIMIT]),
+                "props": props,
+                "languages": "en",
                 "format": "json"
             },
-            headers=HEADERS,
             timeout=30
         )
         response.raise_for_status()
 
-        data = response.json()
-        results = data.get("search", [])
+        for qid, entity in response.json().get("entities", {}).items():
+            if "missing" not in entity:
+                entities[qid] = entity
+    return entities
+
+
+def _claim_ids(entity: dict, prop: str) -> list[str]:
+    """Item IDs an entity links to through a property, in statement order."""
+    ids = []
+    for claim in entity.get("claims", {}).get(prop, []):
+        value = claim.get("mainsnak", {}).get("datavalue", {}).get("value")
+        if isinstance(value, dict) and value.get("id"):
+            ids.append(value["id"])
+    return ids
+
+
+def _series_claim(entity: dict) -> Optional[tuple[str, Optional[int]]]:
+    """First (series QID, position) from an entity's P179 statements."""
+    for claim in entity.get("claims", {}).get("P179", []):
+        value = claim.get("mainsnak", {}).get("datavalue", {}).get("value")
+        if not isinstance(value, dict) or not value.get("id"):
+            continue
+
+        position = None
+        for qualifier in claim.get("qualifiers", {}).get("P1545", []):
+            ordinal = qualifier.get("datavalue", {}).get("value")
+            position = parse_ordinal(ordinal) if isinstance(ordinal, str) else None
+            if position is not None:
+                break
+        return value["id"], position
+    return None
 
-        # Check each result for series info
-        for item in results:
-            qid = item.get("id")
-            if qid:
-                series_info = _get_series_for_entity(qid)
-                if series_info:
-                    return series_info
 
-        return None
+def _book_items(qids: list[str]) -> set[str]:
+    """Items that are an instance of a book class or any of its subclasses."""
+    values_clause = " ".join(f"wd:{qid}" for qid in qids)
+    response = _SESSION.get(
+        WIKIDATA_SPARQL_ENDPOINT,
+        params={"query": _BOOK_TYPE_QUERY % values_clause, "format": "json"},
+        timeout=30
+    )
+    response.raise_for_status()
 
-    except Exception:
-        return None
+    bindings = response.json().get("results", {}).get("bindings", [])
+    return {
+        binding["item"]["value"].rpartition("/")[2]
+        for binding in bindings if "item" in binding
+    }
 
 
-def _get_series_for_entity(qid: str) -> Optional[SeriesInfo]:
-    """Get series information for a specific Wikidata entity."""
-    query = f'''
-    SELECT ?item ?itemLabel ?series ?seriesLabel ?position WHERE {{
-      BIND(wd:{qid} AS ?item)
-
-      # Check if it's a book/literary work
-      {{ ?item wdt:P31/wdt:P279* wd:Q7725634 . }}
-      UNION
-      {{ ?item wdt:P31/wdt:P279* wd:Q571 . }}
-      UNION
-      {{ ?item wdt:P31/wdt:P279* wd:Q47461344 . }}
-
-      # Get series info - direct or via work
-      {{
-        ?item wdt:P179 ?series .
-        OPTIONAL {{
-          ?item p:P179 ?stmt .
-          ?stmt ps:P179 ?series ;
-                pq:P1545 ?position .
-        }}
-      }}
-      UNION
-      {{
-        ?item wdt:P629 ?work .
-        ?work wdt:P179 ?series .
-        OPTIONAL {{
-          ?work p:P179 ?stmt .
-          ?stmt ps:P179 ?series ;
-                pq:P1545 ?position .
-        }}
-      }}
-
-      SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en". }}
-    }}
-    LIMIT 1
-    '''
+def _series_for_entities(qids: list[str]) -> Optional[SeriesInfo]:
+    """
+    Get series information for the first of several entities that has any.
 
-    try:
-        response = requests.get(
-            WIKIDATA_SPARQL_ENDPOINT,
-            params={"query": query, "format": "json"},
-            headers=HEADERS,
-            timeout=30
-        )
-        response.raise_for_status()
+    Fetches the entities, the works that editions point to (P629) and the
+    series labels with one wbgetentities call each, instead of one SPARQL
+    query per entity. Entities that are not directly a BOOK_CLASSES instance
+    get one batched subclass check, so novellas, graphic novels and the like
+    still count as books.
+    """
+    entities = _batch_get_entities(qids)
+    direct = {
+        qid for qid in entities
+        if BOOK_CLASSES.intersection(_claim_ids(entities[qid], "P31"))
+    }
+    others = [qid for qid in qids if qid in entities and qid not in direct]
+    subclassed = _book_items(others) if others else set()
+    books = [qid for qid in qids if qid in direct or qid in subclassed]
+
+    # Editions without their own series link inherit the work's
+    work_ids = {}
+    for qid in books:
+        if not _series_claim(entities[qid]):
+            works = _claim_ids(entities[qid], "P629")
+            if works:
+                work_ids[qid] = works[0]
+    works = _batch_get_entities(list(set(work_ids.values())), props="claims") if work_ids else {}
+
+    series_claims = {}
+    for qid in books:
+        claim = _series_claim(entities[qid])
+        if not claim and work_ids.get(qid) in works:
+            claim = _series_claim(works[work_ids[qid]])
+        if claim:
+            series_claims[qid] = claim
+    if not series_claims:
+        return None
 
-        data = response.json()
-        bindings = data.get("results", {}).get("bindings", [])
+    series_ids = list({series_id for series_id, _ in series_claims.values()})
+    series_entities = _batch_get_entities(series_ids, props="labels")
+
+    for qid in books:
+        if qid not in series_claims:
+            continue
+        series_id, position = series_claims[qid]
+        label = series_entities.get(series_id, {}).get("labels", {}).get("en", {}).get("value")
+        if label:
+            return SeriesInfo(
+                wikidata_id=qid,
+                series_name=label,
+                series_position=position,
+                series_id=series_id
+            )
+    return None
 
-        if bindings:
-            return _parse_series_result(bindings[0])
-        return None
 
-    except Exception:
+def _parse_series_result(result: dict, _get=dict.get) -> Optional[SeriesInfo]:
+    """Parse a SPARQL result into SeriesInfo."""
+    series_name = _get(_get(result, "seriesLabel") or _EMPTY, "value")
+    if not series_name or series_name.startswith("Q"):
         return None
 
+    book_uri = _get(_get(result, "item") or _EMPTY, "value", "")
+    series_uri = _get(_get(result, "series") or _EMPTY, "value", "")
+    position_str = _get(_get(result, "position") or _EMPTY, "value")
 
-def _parse_series_result(result: dict) -> Optional[SeriesInfo]:
-    """Parse a SPARQL result into SeriesInfo."""
-    book_uri = result.get("item", {}).get("value", "")
-    wikidata_id = book_uri.split("/")[-1] if book_uri else None
-    series_name = result.get("seriesLabel", {}).get("value")
-    position_str = result.get("position", {}).get("value")
-    position = int(position_str) if position_str else None
-
-    if series_name and not series_name.startswith("Q"):
-        return SeriesInfo(
-            wikidata_id=wikidata_id,
-            series_name=series_name,
-            series_position=position
-        )
-    return None
+    return SeriesInfo(
+        wikidata_id=book_uri.rpartition("/")[2] or None,
+        series_name=series_name,
+        series_position=parse_ordinal(position_str),
+        series_id=series_uri.rpartition("/")[2] or None
+    )
 
 
 def query_wikidata_batch_by_isbn(isbn_list: list[tuple[str, str]]) -> dict[str, SeriesInfo]:
@@ -406,142 +678,116 @@ def query_wikidata_batch_by_isbn(isbn_list: list[tuple[str, str]]) -> dict[str,
     if not isbn_list:
         return {}
 
-    # Build VALUES clause for ISBNs
-    isbn13_values = []
-    isbn10_values = []
-    isbn_to_key = {}
-
+    # Each valid ISBN is sent once, however many keys asked for it
+    isbn_to_keys = defaultdict(list)
     for isbn, key in isbn_list:
-        clean_isbn = isbn.replace("-", "").strip()
-        isbn_to_key[clean_isbn] = key
-        if len(clean_isbn) == 13:
-            isbn13_values.append(f'"{clean_isbn}"')
-        elif len(clean_isbn) == 10:
-            isbn10_values.append(f'"{clean_isbn}"')
+        clean_isbn = isbn.translate(_NODASH).upper()
+        if is_valid_isbn(clean_isbn):
+            isbn_to_keys[clean_isbn].append(key)
+
+    if not isbn_to_keys:
+        return {}
+
+    # One VALUES clause for ISBN-13s and ISBN-10s; the lengths differ, so
+    # each value can only match its own property
+    values_clause = " ".join([f'"{isbn}"' for isbn in sorted(isbn_to_keys)])
+    query = _BATCH_ISBN_QUERY % values_clause
 
     results = {}
+    for isbn, info in _run_sparql_batch(query, "isbn"):
+        for key in isbn_to_keys.get(isbn, ()):
+            results[key] = info
+    return results
 
-    # Query ISBN-13s
-    if isbn13_values:
-        values_clause = " ".join(isbn13_values)
-        query = f'''
-        SELECT ?isbn ?item ?itemLabel ?series ?seriesLabel ?position WHERE {{
-          VALUES ?isbn {{ {values_clause} }}
-          ?item wdt:P212 ?isbn .
-
-          {{
-            ?item wdt:P179 ?series .
-            OPTIONAL {{
-              ?item p:P179 ?stmt .
-              ?stmt ps:P179 ?series ;
-                    pq:P1545 ?position .
-            }}
-          }}
-          UNION
-          {{
-            ?item wdt:P629 ?work .
-            ?work wdt:P179 ?series .
-            OPTIONAL {{
-              ?work p:P179 ?stmt .
-              ?stmt ps:P179 ?series ;
-                    pq:P1545 ?position .
-            }}
-          }}
-
-          SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en". }}
-        }}
-        '''
-
-        try:
-            response = requests.get(
-                WIKIDATA_SPARQL_ENDPOINT,
-                params={"query": query, "format": "json"},
-                headers=HEADERS,
-                timeout=60
-            )
-            response.raise_for_status()
 
-            data = response.json()
-            for binding in data.get("results", {}).get("bindings", []):
-                isbn = binding.get("isbn", {}).get("value", "")
-                key = isbn_to_key.get(isbn)
-                if key:
-                    info = _parse_series_result(binding)
-                    if info:
-                        results[key] = info
-        except Exception as e:
-            print(f"Batch ISBN-13 query error: {e}")
-
-    # Query ISBN-10s
-    if isbn10_values:
-        values_clause = " ".join(isbn10_values)
-        query = f'''
-        SELECT ?isbn ?item ?itemLabel ?series ?seriesLabel ?position WHERE {{
-          VALUES ?isbn {{ {values_clause} }}
-          ?item wdt:P957 ?isbn .
-
-          {{
-            ?item wdt:P179 ?series .
-            OPTIONAL {{
-              ?item p:P179 ?stmt .
-              ?stmt ps:P179 ?series ;
-                    pq:P1545 ?position .
-            }}
-          }}
-          UNION
-          {{
-            ?item wdt:P629 ?work .
-            ?work wdt:P179 ?series .
-            OPTIONAL {{
-              ?work p:P179 ?stmt .
-              ?stmt ps:P179 ?series ;
-                    pq:P1545 ?position .
-            }}
-          }}
-
-          SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en". }}
-        }}
-        '''
-
-        try:
-            response = requests.get(
-                WIKIDATA_SPARQL_ENDPOINT,
-                params={"query": query, "format": "json"},
-                headers=HEADERS,
-                timeout=60
-            )
+def _run_sparql_batch(query: str, value_key: str) -> list[tuple[str, SeriesInfo]]:
+    """
+    Run a batched SPARQL query and parse its series results.
+
+    Args:
+        query: SPARQL query selecting value_key alongside the series columns
+        value_key: Variable holding the input value (ISBN, title) each row matched
+
+    Returns:
+        List of (matched value, SeriesInfo) in result order; empty on error
+    """
+    try:
+        # POST, since a large VALUES clause can exceed URL length limits
+        with _SESSION.post(
+            WIKIDATA_SPARQL_ENDPOINT,
+            data={"query": query, "format": "json"},
+            timeout=60,
+            stream=ijson is not None
+        ) as response:
             response.raise_for_status()
 
-            data = response.json()
-            for binding in data.get("results", {}).get("bindings", []):
-                isbn = binding.get("isbn", {}).get("value", "")
-                key = isbn_to_key.get(isbn)
-                if key:
+            matches = []
+            for binding in _iter_bindings(response):
+                value = binding.get(value_key, {}).get("value", "")
+                if value:
                     info = _parse_series_result(binding)
                     if info:
-                        results[key] = info
-        except Exception as e:
-            print(f"Batch ISBN-10 query error: {e}")
+                        matches.append((value, info))
+            return matches
 
-    return results
+    # Reading a streamed body goes through urllib3 directly, so transport
+    # failures mid-stream surface as urllib3 errors rather than RequestException
+    except (requests.exceptions.RequestException, TransportError) as e:
+        print(f"Batch {value_key} request error: {e}")
+        return []
+    except _PARSE_ERRORS as e:
+        print(f"Batch {value_key} parse error: {e}")
+        return []
 
 
-def query_wikidata_batch_by_title(titles: list[str]) -> dict[str, SeriesInfo]:
+def _iter_bindings(response: requests.Response) -> Iterator[dict]:
+    """
+    Yield the result bindings of a SPARQL JSON response.
+
+    With ijson installed the (streamed) body is parsed incrementally, so only
+    one binding is held in memory at a time rather than the whole result.
+    """
+    if ijson is None:
+        yield from response.json().get("results", {}).get("bindings", [])
+        return
+
+    # Let urllib3 undo the content encoding, since ijson reads the raw stream
+    response.raw.decode_content = True
+    yield from ijson.items(response.raw, "results.bindings.item")
+
+
+def query_wikidata_batch_by_title(
+    titles: list[str],
+    chunk_size: int = 200,
+    limiter: Optional[RateLimiter] = None,
+) -> dict[str, SeriesInfo]:
     """
     Query Wikidata for multiple titles efficiently.
     Now includes title variations for better matching.
 
     Args:
         titles: List of book titles
+        chunk_size: Maximum titles per SPARQL query; longer VALUES clauses
+            risk hitting the query service timeout
+        limiter: Acquired before each SPARQL query, if given
 
     Returns:
         Dict mapping title to SeriesInfo
     """
-    if not titles:
-        return {}
+    results = {}
+    for start in range(0, len(titles), chunk_size):
+        if limiter:
+            limiter.acquire()
+        results.update(_query_title_chunk(titles[start:start + chunk_size]))
+    return results
+
 
-    # Build VALUES clause with title variations
-    values_parts = []
+def _query_title_chunk(titles: list[str]) -> dict[str, SeriesInfo]:
+    """Run one batched title query; see query_wikidata_batch_by_title."""
+    # Build VALUES clause with title variations. Overlapping variants (e.g.
+    # "Color" and "Colour" titles) are sent once and mapped back to every
+    # title that produced them.
+    values_parts = set()
     title_map = {}
 
     for title in titles:
@@ -549,74 +795,24 @@ def query_wikidata_batch_by_title(titles: list[str]) -> dict[str, SeriesInfo]:
         variations = get_title_variations(title_cased)
 
         for variant in variations:
-            clean = variant.replace('"', '\\"').replace("'", "\\'")
-            values_parts.append(f'"{clean}"@en')
-            title_map[variant.lower()] = title
-
-    values_clause = " ".join([f"({v})" for v in values_parts])
-
-    query = f'''
-    SELECT ?title ?item ?itemLabel ?series ?seriesLabel ?position WHERE {{
-      VALUES (?title) {{ {values_clause} }}
-
-      # Match by label or alternate label
-      {{ ?item rdfs:label ?title . }}
-      UNION
-      {{ ?item skos:altLabel ?title . }}
-
-      # Filter to books/literary works
-      {{ ?item wdt:P31/wdt:P279* wd:Q7725634 . }}
-      UNION
-      {{ ?item wdt:P31/wdt:P279* wd:Q571 . }}
-      UNION
-      {{ ?item wdt:P31/wdt:P279* wd:Q47461344 . }}
-
-      ?item wdt:P179 ?series .
-      OPTIONAL {{
-        ?item p:P179 ?stmt .
-        ?stmt ps:P179 ?series ;
-              pq:P1545 ?position .
-      }}
-      SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en". }}
-    }}
-    '''
-
-    try:
-        response = requests.get(
-            WIKIDATA_SPARQL_ENDPOINT,
-            params={"query": query, "format": "json"},
-            headers=HEADERS,
-            timeout=60
-        )
-        response.raise_for_status()
+            values_parts.add(_sparql_literal(variant))
+            title_map.setdefault(variant.lower(), set()).add(title)
 
-        data = response.json()
-        bindings = data.get("results", {}).get("bindings", [])
+    # Sorted so identical batches produce identical queries
+    values_clause = " ".join([f"({v})" for v in sorted(values_parts)])
 
-        results = {}
-        for result in bindings:
-            title = result.get("title", {}).get("value", "")
-            series_name = result.get("seriesLabel", {}).get("value")
+    query = _BATCH_TITLE_QUERY % values_clause
 
-            if title and series_name and not series_name.startswith("Q"):
-                original_title = title_map.get(title.lower(), title)
-                if original_title not in results:
-                    info = _parse_series_result(result)
-                    if info:
-                        results[original_title] = info
-
-        return results
-
-    except requests.exceptions.RequestException as e:
-        print(f"Batch request error: {e}")
-        return {}
-    except (KeyError, ValueError) as e:
-        print(f"Batch parse error: {e}")
-        return {}
+    results = {}
+    for title, info in _run_sparql_batch(query, "title"):
+        for original_title in title_map.get(title.lower(), {title}):
+            if original_title not in results:
+                results[original_title] = info
+    return results
 
 
 if __name__ == "__main__":
-    print("Testing ISBN lookup...")
+    print("Testing batch ISBN lookup...")
 
     # Test Harry Potter ISBN
     test_isbns = [
@@ -624,15 +820,15 @@ if __name__ == "__main__":
         ("9781335534637", "Heated Rivalry"),
     ]
 
+    isbn_results = query_wikidata_batch_by_isbn(test_isbns)
     for isbn, title in test_isbns:
-        result = query_wikidata_by_isbn(isbn)
+        result = isbn_results.get(title)
         if result:
             print(f"  ISBN {isbn} ({title}): {result.series_name} #{result.series_position}")
         else:
             print(f"  ISBN {isbn} ({title}): NOT FOUND")
-        time.sleep(0.5)
 
-    print("\nTesting title lookup with variations...")
+    print("\nTesting batch title lookup with variations...")
 
     test_books = [
         "Harry Potter and the Sorcerer's Stone",
@@ -641,16 +837,10 @@ if __name__ == "__main__":
         "Heated Rivalry",
     ]
 
+    title_results = query_wikidata_batch_by_title(test_books)
     for title in test_books:
-        result = query_wikidata_by_title(title)
+        result = title_results.get(title)
         if result:
             print(f"  FOUND | {title:40} | {result.series_name} #{result.series_position}")
         else:
             print(f"  NOT FOUND | {title}")
-        time.sleep(0.5)
-
-    print("\nTesting batch query with variations...")
-    results = query_wikidata_batch_by_title(test_books)
-    print(f"  Found {len(results)} books with series info")
-    for title, info in results.items():
-        print(f"    {title}: {info.series_name} #{info.series_position}")